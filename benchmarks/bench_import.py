@@ -0,0 +1,123 @@
+'''
+bench_import.py (Startup benchmark)
+Times `behave --dry-run`, which imports the environment hooks, every step module and the page
+objects they use and parses the feature files without starting a browser. Each run is a fresh
+interpreter, so the numbers are the suite's real startup and discovery cost. One extra run with
+`python -X importtime` lists the slowest imports, so a new heavy dependency or import-time work
+shows up by name. Results are saved as JSON and compared against a stored baseline.
+
+Usage:
+    python -m benchmarks.bench_import [--runs 10] [--output reports/import-benchmark.json]
+                                      [--baseline benchmarks/import-baseline.json] [--save-baseline]
+'''
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+if not __package__:  # Run as a script (python benchmarks/...): the suite's modules are imported from the repo root
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.bench_page_objects import percentile
+
+# Modules of this suite, as opposed to third-party imports
+PROJECT_MODULES = ("config", "pages", "support", "features", "environment", "video_steps")
+
+
+def dry_run_command(paths, python_args=()):
+    return [sys.executable, *python_args, "-m", "behave", "--dry-run", "--format", "null", "--no-summary", *paths]
+
+
+def time_dry_runs(paths, runs):
+    """
+    Runs `behave --dry-run` in `runs` fresh interpreters.
+
+    :return: The wall time of every run, in seconds.
+    """
+    durations = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        completed = subprocess.run(dry_run_command(paths), capture_output=True, text=True)
+        durations.append(time.perf_counter() - started)
+        if completed.returncode != 0:
+            raise RuntimeError(f"behave --dry-run failed:\n{completed.stdout}{completed.stderr}")
+    return durations
+
+
+def slowest_imports(paths, top):
+    """
+    Runs one dry run with -X importtime and returns the slowest imports by cumulative time.
+
+    :return: List of {"module", "self_ms", "cumulative_ms", "project"} dicts, slowest first.
+    """
+    completed = subprocess.run(dry_run_command(paths, ("-X", "importtime")), capture_output=True, text=True)
+    imports = []
+    for line in completed.stderr.splitlines():
+        # Format: "import time: <self us> | <cumulative us> | <indented module name>"
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, module = line[len("import time:"):].split("|")
+        module = module.strip()
+        imports.append({
+            "module": module,
+            "self_ms": int(self_us) / 1000,
+            "cumulative_ms": int(cumulative_us) / 1000,
+            "project": module.split(".")[0] in PROJECT_MODULES,
+        })
+    imports.sort(key=lambda entry: entry["cumulative_ms"], reverse=True)
+    return imports[:top]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the startup and discovery time of `behave --dry-run`.")
+    parser.add_argument("paths", nargs="*", default=["features"], help="Feature files or directories (default: features)")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--top", type=int, default=15, help="Number of slowest imports to list")
+    parser.add_argument("--output", default=os.path.join("reports", "import-benchmark.json"))
+    parser.add_argument("--baseline", default=os.path.join("benchmarks", "import-baseline.json"))
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed median increase over the baseline")
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results as the new baseline")
+    args = parser.parse_args(argv)
+
+    durations = time_dry_runs(args.paths, args.runs)
+    results = {
+        "runs": args.runs,
+        "min_ms": min(durations) * 1000,
+        "p50_ms": percentile(durations, 0.50) * 1000,
+        "max_ms": max(durations) * 1000,
+        "slowest_imports": slowest_imports(args.paths, args.top),
+    }
+
+    print(f"behave --dry-run over {args.runs} runs: min {results['min_ms']:.0f}ms, "
+          f"p50 {results['p50_ms']:.0f}ms, max {results['max_ms']:.0f}ms")
+    print(f"{'module':<48} {'self ms':>8} {'cumul ms':>9}")
+    for entry in results["slowest_imports"]:
+        marker = "*" if entry["project"] else " "
+        print(f"{marker}{entry['module'].strip()[:47]:<47} {entry['self_ms']:>8.1f} {entry['cumulative_ms']:>9.1f}")
+    print("(* = module of this suite)")
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w") as output_file:
+        json.dump(results, output_file, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as baseline_file:
+            json.dump(results, baseline_file, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+        if results["p50_ms"] > baseline["p50_ms"] * (1 + args.tolerance):
+            print(f"REGRESSION behave --dry-run: p50 {results['p50_ms']:.0f}ms > baseline "
+                  f"{baseline['p50_ms']:.0f}ms (+{args.tolerance:.0%})")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,190 @@
+'''
+bench_page_objects.py (Page-object benchmark)
+Runs page-object operations N times against the local fixture pages in benchmarks/fixtures
+(login form, project tabs and a JW-style player) and reports their latency percentiles, WebDriver
+command counts and throughput. Results are saved as JSON and can be compared against a stored
+baseline, so a new wait or locator shows up as a number.
+
+Usage:
+    python -m benchmarks.bench_page_objects [--iterations 50] [--wait-engine poll|event] [--output reports/benchmark.json]
+                                            [--baseline benchmarks/baseline.json] [--save-baseline]
+'''
+
+import argparse
+import functools
+import json
+import math
+import os
+import sys
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+if not __package__:  # Run as a script (python benchmarks/...): the suite's modules are imported from the repo root
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+
+from pages.login_page import LoginPage
+from pages.project_page import ProjectPage
+from pages.conditions import VideoPlaying
+from support.command_counter import counter_for
+from support.driver_factory import create_driver
+from support.page_registry import PageRegistry
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def start_fixture_server():
+    """
+    Serves benchmarks/fixtures on a free local port.
+    """
+    handler = functools.partial(QuietHandler, directory=FIXTURES_DIR)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/index.html"
+
+
+def open_view(driver, url, view):
+    """
+    Loads the fixture on a view ('login', 'project' or 'player') from the top-level document.
+    """
+    pages = PageRegistry(driver)
+    driver.get(f"{url}?view={view}")
+    pages.invalidate()  # The navigation is back on the top-level document
+    if view == "player":
+        video_page = pages.video
+        with video_page.player_frame():  # The player must be running before it is controlled
+            video_page.wait_until(VideoPlaying())
+
+
+def operations(driver):
+    """
+    The benchmarked operations: name -> (view to start from, callable taking the iteration number).
+    The page objects come from page registries, as in the step definitions.
+    """
+    ui_pages, api_pages = PageRegistry(driver, "ui"), PageRegistry(driver, "api")
+
+    def wait_for_element(i):
+        ui_pages.project.invalidate_cache()  # Measure the lookup, not a cache hit
+        ui_pages.project.wait_for_element(*ProjectPage.VIDEOS_TAB)
+
+    return {
+        "wait_for_element": ("project", wait_for_element),
+        "wait_for_element[cached]": ("project", lambda i: ui_pages.project.wait_for_element(*ProjectPage.VIDEOS_TAB)),
+        "click": ("project", lambda i: ui_pages.project.click(*(ProjectPage.DETAILS_TAB if i % 2 else ProjectPage.VIDEOS_TAB))),
+        "send_keys": ("login", lambda i: ui_pages.login.send_keys(*LoginPage.PIN_INPUT, "1234")),
+        "wait_for_elements": ("login", lambda i: ui_pages.login.wait_until_loaded()),
+        "change_resolution[ui]": ("player", lambda i: ui_pages.video.change_resolution("480p" if i % 2 == 0 else "720p")),
+        "change_resolution[api]": ("player", lambda i: api_pages.video.change_resolution("480p" if i % 2 == 0 else "720p")),
+        "get_player_state": ("player", lambda i: ui_pages.video.get_player_state()),
+    }
+
+
+def percentile(values, fraction):
+    """
+    Nearest-rank percentile of a list of numbers.
+    """
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def run(iterations, profile_name, selected=None):
+    """
+    Runs every operation `iterations` times and returns the results per operation.
+    """
+    server, url = start_fixture_server()
+    driver = create_driver(profile_name)
+    counter = counter_for(driver)
+    results = {}
+    try:
+        for name, (view, operation) in operations(driver).items():
+            if selected and name not in selected:
+                continue
+            open_view(driver, url, view)
+            operation(0)  # Warm-up, not measured
+            latencies, commands = [], []
+            for iteration in range(1, iterations + 1):
+                before = counter.total
+                started = time.perf_counter()
+                operation(iteration)
+                latencies.append(time.perf_counter() - started)
+                commands.append(counter.total - before)
+            results[name] = {
+                "iterations": iterations,
+                "p50_ms": percentile(latencies, 0.50) * 1000,
+                "p95_ms": percentile(latencies, 0.95) * 1000,
+                "p99_ms": percentile(latencies, 0.99) * 1000,
+                "mean_ms": sum(latencies) / iterations * 1000,
+                "commands_per_op": sum(commands) / iterations,
+                "ops_per_second": iterations / sum(latencies),
+            }
+    finally:
+        driver.quit()
+        server.shutdown()
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """
+    Lists the regressions against a baseline: p95 latency above baseline * (1 + tolerance),
+    or more WebDriver commands per operation than the baseline.
+    """
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        reference = baseline[name]
+        if result["p95_ms"] > reference["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {result['p95_ms']:.1f}ms > baseline {reference['p95_ms']:.1f}ms (+{tolerance:.0%})")
+        if result["commands_per_op"] > reference["commands_per_op"]:
+            regressions.append(f"{name}: {result['commands_per_op']:.1f} commands/op > baseline {reference['commands_per_op']:.1f}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark page-object operations against local fixture pages.")
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--profile", default="headless", help="Browser profile from config.BROWSER_PROFILES")
+    parser.add_argument("--wait-engine", choices=["poll", "event"], default=config.WAIT_ENGINE, help="Wait engine of the page objects")
+    parser.add_argument("--only", nargs="*", help="Operations to run (default: all)")
+    parser.add_argument("--output", default=os.path.join("reports", "benchmark.json"))
+    parser.add_argument("--baseline", default=os.path.join("benchmarks", "baseline.json"))
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed p95 increase over the baseline")
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results as the new baseline")
+    args = parser.parse_args(argv)
+
+    config.WAIT_ENGINE = args.wait_engine
+    results = run(args.iterations, args.profile, args.only)
+
+    print(f"{'operation':<24} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'cmds/op':>8} {'ops/s':>8}")
+    for name, result in results.items():
+        print(f"{name:<24} {result['p50_ms']:>8.1f} {result['p95_ms']:>8.1f} {result['p99_ms']:>8.1f} "
+              f"{result['commands_per_op']:>8.1f} {result['ops_per_second']:>8.1f}")
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w") as output_file:
+        json.dump(results, output_file, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as baseline_file:
+            json.dump(results, baseline_file, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as baseline_file:
+            regressions = compare(results, json.load(baseline_file), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
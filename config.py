@@ -1,2 +1,123 @@
+import os  # Importing os module for environment variable handling.
+from dotenv import load_dotenv  # Importing dotenv to load environment variables from .env file.
+
+# Load environment variables from the .env file, once for the whole suite
+load_dotenv()
+
+# The PIN used to log in (MY_PIN in the .env file); read it through get_pin()
+MY_PIN = os.getenv("MY_PIN")
+
+
+def get_pin():
+    """
+    Returns the login PIN. Only the steps that log in need it, so a missing PIN fails those steps
+    instead of every import (e.g. `behave --dry-run` works without a .env file).
+    """
+    if not MY_PIN:
+        raise ValueError("PIN not found in .env file.")
+    return MY_PIN
+
+
 BASE_URL = "https://indeedemo-fyc.watch.indee.tv/"
 TIMEOUT = 10  # Default timeout for waits
+ELEMENT_TIMEOUT = 15  # Default timeout for waiting on an element to be clickable
+POLL_FREQUENCY = 0.25  # Seconds between two checks of a wait condition
+WAIT_ENGINE = "poll"  # "poll" checks wait conditions with WebDriver commands, "event" blocks in the page until an event makes them hold (-D wait_engine=event)
+WAIT_EVENT_RECHECK = 1.0  # Seconds between two in-page re-checks of an event wait, for changes no event reports
+PLAYBACK_SECONDS = 3  # Seconds of real playback to wait for after pressing play
+POOL_SIZE = 1  # Number of warm browser sessions kept ready for the next scenario
+POOL_MAX_USES = 20  # Scenarios a browser session serves before it is replaced by a fresh one
+SESSION_CACHE = True  # Reuse one PIN login for all scenarios of a run (tag a scenario @real_login to opt out)
+SESSION_MAX_AGE = 1800  # Seconds after which the cached login is no longer reused
+SESSION_RESTORE_TIMEOUT = 5  # Seconds to wait for the project page after injecting a cached login
+TRACE = True  # Record step, wait and action timings (disable with -D trace=off)
+TRACE_DIR = "reports"  # Directory the per-run timing traces are written to
+PLAYER_CONTROL = "ui"  # "ui" clicks the JW Player controls, "api" calls the JW Player JavaScript API (-D player_control=api)
+
+# Named Chrome profiles, selectable per run (-D browser_profile=<name>) or per scenario (@browser.<name> tag).
+# Keys: headless, maximize, window_size, disable_extensions, disable_gpu, block_images,
+# disk_cache_dir (parent of the sessions' persistent HTTP caches, one each) and media_bandwidth_kbps (throttles downloads so
+# the player picks a low bitrate).
+BROWSER_PROFILES = {
+    "default": {"maximize": True},
+    "headless": {
+        "headless": True,
+        "window_size": (1366, 768),
+        "disable_extensions": True,
+        "disable_gpu": True,
+    },
+    "lean": {
+        "headless": True,
+        "window_size": (1280, 720),
+        "disable_extensions": True,
+        "disable_gpu": True,
+        "block_images": True,
+        "disk_cache_dir": ".browser-cache",
+        "media_bandwidth_kbps": 1500,
+    },
+}
+BROWSER_PROFILE = "default"  # Profile used when the run and the scenario do not choose one
+
+NETWORK_LAYER = True  # Block NETWORK_BLOCKED_URLS, keep a persistent HTTP cache and record requests (-D network=off)
+NETWORK_CACHE_DIR = ".browser-cache"  # Persistent HTTP cache, one sub-directory per browser session
+NETWORK_BLOCKED_URLS = [  # DevTools URL patterns ('*' wildcards) that are never downloaded
+    "*google-analytics.com*",
+    "*googletagmanager.com*",
+    "*doubleclick.net*",
+    "*hotjar.com*",
+    "*fonts.googleapis.com*",
+    "*fonts.gstatic.com*",
+]
+
+COMMAND_BUDGET_MODE = "warn"  # What a step exceeding its @command_budget does: "fail", "warn" or "off"
+
+# Grid mode: sessions are created on a Selenium Grid/standalone server (-D grid_url=<url>), or on a
+# dispatcher spreading them over local chromedriver processes (-D grid=local, see support/grid.py)
+GRID_URL = None
+GRID_NODES = 2  # chromedriver processes started by the local dispatcher
+GRID_SLOTS_PER_NODE = 2  # Concurrent browser sessions per chromedriver process
+GRID_QUEUE_TIMEOUT = 300  # Seconds a new session waits for a free slot before failing
+GRID_COMMAND_TIMEOUT = 120  # Seconds the dispatcher waits for a node to answer one command
+
+# Load generation (python -m support.load_generator): defaults for the simulated viewers
+LOAD_VIEWERS = 5  # Concurrent viewers, each with its own browser session
+LOAD_RAMP_UP = 30  # Seconds over which the viewers are started, evenly spaced
+LOAD_DURATION = 300  # Seconds after which no viewer starts a new iteration
+LOAD_THINK_TIME = "exponential:2"  # Pause between two steps: constant:<s>, uniform:<min>:<max>, exponential:<mean> or normal:<mean>:<sd>
+LOAD_PROFILE = "headless"  # Browser profile of the viewers
+
+# Test-impact selection (python -m support.test_impact): results of past runs, and how long an unchanged pass is trusted
+IMPACT_CACHE_FILE = ".cache/test_impact.json"
+IMPACT_MAX_AGE = 7 * 24 * 3600  # Seconds; older passes are run again even if nothing changed
+
+# Failure artifacts (screenshot, DOM, console log, last WebDriver commands) saved when a step fails (-D artifacts=off)
+ARTIFACTS = True
+ARTIFACT_MAX_MB = 50  # Maximum size written per run (per parallel worker); screenshots are dropped first
+ARTIFACT_COMMANDS = 50  # Number of last WebDriver commands kept for the artifacts
+
+# Video quality-of-experience checks of the playback steps (see support/qoe.py).
+# QOE_MODE: "fail" fails a step whose metrics exceed a threshold, "warn" prints it, "off" skips the collection (-D qoe=<mode>).
+# "warn" by default: a slow first load or frames dropped by a headless/CI browser should not fail the scenario
+QOE_MODE = "warn"
+QOE_THRESHOLDS = {
+    "startup_ms": 30000,  # Play click to first rendered frame; the same as the "video to start playing" wait below
+    "rebuffer_count": 3,  # Stalls after playback started
+    "rebuffer_ms": 5000,  # Total stalled time
+    "dropped_ratio": 0.1,  # Dropped / decoded frames
+    "switch_ms": 10000,  # Requested quality until it is rendered
+}
+
+# Adaptive timeouts: every wait's duration is stored in ADAPTIVE_STATS_FILE; with ADAPTIVE_TIMEOUTS
+# (or -D adaptive_timeouts=on) a wait's timeout becomes p99 * ADAPTIVE_SAFETY_FACTOR of its history,
+# clamped to [ADAPTIVE_MIN_TIMEOUT, ADAPTIVE_MAX_TIMEOUT], once it has ADAPTIVE_MIN_SAMPLES samples.
+ADAPTIVE_TIMEOUTS = False
+ADAPTIVE_STATS_FILE = ".cache/wait_stats.json"
+ADAPTIVE_SAFETY_FACTOR = 3.0
+ADAPTIVE_MIN_TIMEOUT = 2.0
+ADAPTIVE_MAX_TIMEOUT = 15.0
+ADAPTIVE_MIN_SAMPLES = 5
+# Fixed timeouts for known-slow waits, keyed by wait description; they bypass the adaptive timeouts
+TIMEOUT_OVERRIDES = {
+    "video to start playing": 30,  # First video load
+    "frame ('id', 'video_player') to be available": 20,
+}
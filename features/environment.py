@@ -0,0 +1,241 @@
+'''
+environment.py (Behave hooks)
+Manages the browser sessions: a pool of warm Chrome sessions is started before the run,
+one is handed to every scenario and it is reset and returned to the pool afterwards.
+There is one pool per browser profile; a scenario tagged @browser.<name> gets a session of
+that profile, other scenarios get the run's profile (-D browser_profile=<name>).
+Unless '-D network=off' is given, sessions block config.NETWORK_BLOCKED_URLS, keep a persistent
+HTTP cache and their requests are summarized at the end of the run.
+'-D record=<archive>' records the site's HTTP traffic during the run; '-D replay=<archive>' serves a
+recording from a local server and points config.BASE_URL at it ('-D base_url=<url>' for a server
+started separately with python -m support.replay_server).
+WebDriver commands are counted per step and page-object method; steps with a @command_budget are
+checked against it ('-D command_budget=fail|warn|off').
+Waits poll their condition, or with '-D wait_engine=event' block in the page until it holds.
+The time every wait takes is kept in config.ADAPTIVE_STATS_FILE; with '-D adaptive_timeouts=on'
+waits use timeouts learned from it (see support/adaptive_timeouts.py).
+The playback steps check video QoE metrics against config.QOE_THRESHOLDS ('-D qoe=fail|warn|off');
+the samples are written next to the trace.
+The PIN login is done once per run and its session is injected into the following scenarios.
+Steps reach the page objects through context.pages, which creates each page once per browser session.
+'-D grid_url=<url>' starts the sessions on a Selenium Grid/standalone server, '-D grid=local' on a
+dispatcher spreading them over local chromedriver processes (see support/grid.py).
+Every step is timed, and the run's timing trace is written to config.TRACE_DIR at the end.
+When a step fails, a screenshot, the DOM, the console log and the last WebDriver commands are written
+to config.TRACE_DIR/artifacts/<run> in the background ('-D artifacts=off' to disable).
+'''
+
+import os
+import time
+import config
+from behave.model_core import Status
+from support.driver_factory import create_driver, check_remote_support
+from support.adaptive_timeouts import LatencyStats, get_latency_stats, set_latency_stats
+from support.command_counter import counter_for, report as command_report
+from support.driver_pool import DriverPool
+from support.failure_artifacts import FailureArtifacts, get_artifacts, set_artifacts
+from support.grid import GridDispatcher
+from support.har_recorder import HarRecorder
+from support.replay_server import ReplayServer
+from support.network import NetworkMonitor
+from support.page_registry import pages_for
+from support.qoe import QoeReport
+from support.resource_usage import ResourceMonitor
+from support.session_cache import SessionCache
+from support.tracing import Tracer, get_tracer, set_tracer
+
+
+def before_all(context):
+    userdata = context.config.userdata
+    if userdata.getbool("trace", config.TRACE):
+        set_tracer(Tracer())
+    context.run_name = f"{time.strftime('%Y%m%d-%H%M%S')}-{userdata.get('worker_id', os.getpid())}"
+    if userdata.getbool("artifacts", config.ARTIFACTS):
+        set_artifacts(FailureArtifacts(os.path.join(config.TRACE_DIR, "artifacts", context.run_name),
+                                       config.ARTIFACT_MAX_MB * 1_000_000))
+    set_latency_stats(LatencyStats(
+        config.ADAPTIVE_STATS_FILE,
+        apply=userdata.getbool("adaptive_timeouts", config.ADAPTIVE_TIMEOUTS),
+        safety_factor=config.ADAPTIVE_SAFETY_FACTOR,
+        floor=config.ADAPTIVE_MIN_TIMEOUT,
+        cap=config.ADAPTIVE_MAX_TIMEOUT,
+        min_samples=config.ADAPTIVE_MIN_SAMPLES,
+    ))
+
+    # Record/replay: must happen first, since everything below reads config.BASE_URL
+    context.replay_server = None
+    if userdata.get("replay"):
+        context.replay_server = ReplayServer(
+            userdata["replay"],
+            latency_ms=float(userdata.get("replay_latency_ms", 0)),
+            jitter_ms=float(userdata.get("replay_jitter_ms", 0)),
+            seed=int(userdata.get("replay_seed", 0)),
+        ).start()
+        config.BASE_URL = context.replay_server.url
+    elif userdata.get("base_url"):
+        config.BASE_URL = userdata["base_url"]
+    context.recorder = HarRecorder(config.BASE_URL) if userdata.get("record") else None
+
+    # Recording reads the same DevTools network events, so it needs the network layer
+    context.network = userdata.getbool("network", config.NETWORK_LAYER) or context.recorder is not None
+    context.network_monitor = NetworkMonitor()
+
+    # Grid mode: an external endpoint, or a dispatcher over local chromedriver processes for this run
+    context.grid = None
+    context.grid_url = userdata.get("grid_url", config.GRID_URL)
+    if context.grid_url or userdata.get("grid") == "local":
+        check_remote_support()
+    if userdata.get("grid") == "local" and not context.grid_url:
+        context.grid = GridDispatcher(
+            nodes=int(userdata.get("grid_nodes", config.GRID_NODES)),
+            slots=int(userdata.get("grid_slots", config.GRID_SLOTS_PER_NODE)),
+        )
+        context.grid.start()
+        context.grid_url = context.grid.url
+
+    # Pools are created on first use; only the run's default profile is launched ahead of time
+    context.driver_pools = {}
+    context.browser_profile = userdata.get("browser_profile", config.BROWSER_PROFILE)
+    get_driver_pool(context, context.browser_profile).prelaunch()
+    context.resource_monitor = ResourceMonitor()
+    context.command_budget_mode = userdata.get("command_budget", config.COMMAND_BUDGET_MODE)
+    context.command_counters = []
+
+    # '-D qoe=warn' reports QoE threshold violations without failing the step, '-D qoe=off' skips the collection
+    context.qoe_mode = userdata.get("qoe", config.QOE_MODE)
+    context.qoe_report = QoeReport()
+
+    # '-D wait_engine=event' makes the page objects' waits block in the page instead of polling
+    config.WAIT_ENGINE = userdata.get("wait_engine", config.WAIT_ENGINE)
+
+    # '-D player_control=api' drives the video player through the JW Player API instead of its controls
+    context.player_control = userdata.get("player_control", config.PLAYER_CONTROL)
+
+    # '-D session_cache=off' makes every scenario log in with the real PIN flow
+    context.session_cache = None
+    if userdata.getbool("session_cache", config.SESSION_CACHE):
+        context.session_cache = SessionCache(
+            config.BASE_URL,
+            path=userdata.get("session_cache_file"),  # Shared between the workers of a parallel run
+            max_age=config.SESSION_MAX_AGE,
+        )
+
+
+def get_driver_pool(context, profile_name):
+    """
+    Returns the pool of sessions for a browser profile, creating it on first use.
+    """
+    if profile_name not in context.driver_pools:
+        if profile_name not in config.BROWSER_PROFILES:
+            raise ValueError(f"Unknown browser profile '{profile_name}', expected one of {sorted(config.BROWSER_PROFILES)}")
+        userdata = context.config.userdata
+        profile_dir = userdata.get("profile_dir")  # Set per worker by the parallel runner
+        download_dir = userdata.get("download_dir")
+
+        def launch(number, slot):
+            # Concurrent Chrome sessions cannot share a profile or cache directory, so each gets its own.
+            # Profiles are per launch, so a recycled session starts fresh. Cache directories are per pool slot:
+            # named the same way in every run and reused by replacement sessions, which is what makes them
+            # persistent (and keeps their number bounded by the pool's size).
+            # Recording runs start with an empty cache so that every response is downloaded (and recorded).
+            slot_cache = os.path.join(f"worker-{userdata.get('worker_id', 0)}", f"{profile_name}-{slot}")
+            return create_driver(
+                profile_name,
+                profile_dir=os.path.join(profile_dir, f"session-{profile_name}-{number}") if profile_dir else None,
+                download_dir=download_dir,
+                network=context.network,
+                disk_cache_dir=os.path.join(config.NETWORK_CACHE_DIR, slot_cache)
+                if context.network and context.recorder is None else None,
+                remote_url=context.grid_url,
+                cache_name=slot_cache if context.recorder is None else None,  # For a profile with its own cache directory
+            )
+
+        context.driver_pools[profile_name] = DriverPool(
+            launch,
+            size=int(userdata.get("pool_size", config.POOL_SIZE)),
+            max_uses=int(userdata.get("pool_max_uses", config.POOL_MAX_USES)),
+        )
+    return context.driver_pools[profile_name]
+
+
+def before_scenario(context, scenario):
+    # A @browser.<name> tag on the scenario (or its feature) overrides the run's profile
+    context.scenario_profile = next(
+        (tag.split(".", 1)[1] for tag in context.tags if tag.startswith("browser.")), context.browser_profile
+    )
+    context.driver = get_driver_pool(context, context.scenario_profile).acquire()
+    context.pages = pages_for(context.driver, context.player_control, context.qoe_mode)  # Page objects of this browser session
+    counter = counter_for(context.driver)
+    if counter not in context.command_counters:
+        context.command_counters.append(counter)
+
+
+def before_step(context, step):
+    context.current_step_name = step.name  # Used in command budget messages
+    context.step_commands = counter_for(context.driver).total
+    counter_for(context.driver).start_step(step.name)
+    context.step_started = time.perf_counter()
+
+
+def after_step(context, step):
+    counter = counter_for(context.driver)
+    counter.end_step()
+    get_tracer().record("step", step.name, context.step_started, time.perf_counter() - context.step_started,
+                        outcome=step.status.name, location=str(step.location),
+                        commands=counter.total - context.step_commands)
+    if step.status in (Status.failed, Status.error):
+        # Read from the browser now, compressed and written by a background thread
+        get_artifacts().capture(context.driver, f"{context.scenario.name} / {step.name}",
+                                error=step.exception, step=step.name)
+    if context.recorder is not None:
+        # Response bodies are only available while their page is loaded, so collect after every step
+        context.network_monitor.collect(context.driver, context.scenario.name, context.recorder)
+
+
+def after_scenario(context, scenario):
+    try:
+        if context.network:
+            context.network_monitor.collect(context.driver, scenario.name, context.recorder)
+        context.resource_monitor.sample(context.scenario_profile, context.driver)
+    finally:
+        # Always give the session back, so a crashed one is discarded and replaced
+        context.driver_pools[context.scenario_profile].release(context.driver)
+
+
+def after_all(context):
+    for profile_name, driver_pool in sorted(context.driver_pools.items()):
+        driver_pool.shutdown()
+        print(f"[{profile_name}] {driver_pool.report()}")
+    print(context.resource_monitor.report())
+    print(command_report(context.command_counters))
+    get_latency_stats().save()
+    if context.network:
+        print(context.network_monitor.report())
+    if context.recorder is not None:
+        context.recorder.save(context.config.userdata["record"])
+        print(f"Recorded {len(context.recorder.entries)} responses to {context.config.userdata['record']}")
+    if context.replay_server is not None:
+        context.replay_server.stop()
+    if context.grid is not None:
+        print(context.grid.report())
+        context.grid.stop()
+
+    get_artifacts().close()
+    if get_artifacts().enabled:
+        print(get_artifacts().report())
+
+    name = f"trace-{context.run_name}"
+    if context.qoe_report.entries:
+        print(context.qoe_report.report())
+        os.makedirs(config.TRACE_DIR, exist_ok=True)
+        context.qoe_report.write(os.path.join(config.TRACE_DIR, name + ".qoe.json"))
+
+    tracer = get_tracer()
+    if tracer.enabled:
+        # One pair of files per run (and per parallel worker)
+        os.makedirs(config.TRACE_DIR, exist_ok=True)
+        tracer.write_jsonl(os.path.join(config.TRACE_DIR, name + ".jsonl"))
+        tracer.write_chrome_trace(os.path.join(config.TRACE_DIR, name + ".trace.json"))
+        if context.network:
+            context.network_monitor.write_jsonl(os.path.join(config.TRACE_DIR, name + ".network.jsonl"))
+        print(tracer.summary())
@@ -1,154 +1,165 @@
+from contextlib import nullcontext  # Used when the login is not shared with other workers.
 from behave import *  # Importing the Behave module for BDD (Behavior-Driven Development).
-from selenium import webdriver  # Importing Selenium WebDriver for browser automation.
-from pages.login_page import LoginPage  # Importing the LoginPage class from the 'pages' module.
-from pages.project_page import ProjectPage  # Importing the ProjectPage class from the 'pages' module.
-from pages.video_page import VideoPage  # Importing the VideoPage class from the 'pages' module.
-from pages.logout_page import LogoutPage  # Importing the LogoutPage class from the 'pages' module.
-import time  # Importing the time module to introduce delays between actions.
-from selenium.webdriver.common.by import By  # Importing 'By' to locate elements.
-from selenium.webdriver.support.ui import WebDriverWait  # Importing WebDriverWait to wait for elements.
-from selenium.webdriver.support import expected_conditions as EC  # Importing expected conditions for element visibility.
-import config  # Importing the config file for base URL and other configurations.
-from pages.base_page import BasePage  # Importing the BasePage class to create reusable methods for page actions.
-
-from dotenv import load_dotenv  # Importing dotenv to load environment variables from .env file.
-import os  # Importing os module for environment variable handling.
-
-# Load environment variables from the .env file
-load_dotenv()
-
-# Retrieve the PIN from the environment variables
-pin = os.getenv("MY_PIN")
-
-# Raise an error if the PIN is not found in the environment variables
-if not pin:
-    raise ValueError("PIN not found in .env file.")
+import config  # Importing the config file for base URL, the PIN and other configurations.
+from support.command_counter import command_budget  # Importing the decorator limiting the WebDriver commands of a step.
+from support.qoe import check_qoe  # Importing the check of the video quality-of-experience metrics.
+
+# The page objects are created once per browser session and reached through context.pages
+# (context.pages.login, .project, .video and .logout; see support/page_registry.py)
 
 # Step for navigating to the login page
 @given('I am on the login page')
 def step_impl(context):
-    # Initialize the WebDriver (Chrome in this case)
-    context.driver = webdriver.Chrome()  # Ensure chromedriver is set in PATH
+    # The WebDriver is a warm session handed out by the driver pool (see features/environment.py)
+    # The window size comes from the browser profile (see config.BROWSER_PROFILES)
     context.driver.get(config.BASE_URL)  # Open the login page URL.
-    
-    # Maximize the browser window for a consistent testing environment
-    context.driver.maximize_window()
+    context.pages.invalidate()  # Elements cached on the previous page are gone
 
-    # Initialize the LoginPage class for interaction with the login page
-    context.login_page = LoginPage(context.driver)
-    # Assert that the logo element is displayed to ensure the page is loaded properly
-    assert context.login_page.get_logo_element().is_displayed()
+    # Wait for the logo, PIN input and Sign In button (checked together) to ensure the page is loaded properly
+    context.pages.login.wait_until_loaded()
 
 # Step for logging in with a provided PIN
 @when('I login with the provided PIN')
 def step_impl(context):
-    # Reinitialize the LoginPage class for the login action
-    context.login_page = LoginPage(context.driver)
-    # Call the login method from the LoginPage class and pass the PIN
-    context.login_page.login(str(pin))
-    # Initialize the ProjectPage class to interact with the project page after login
-    context.project_page = ProjectPage(context.driver)
-    # Assert that the project page is displayed after successful login
-    assert context.project_page.get_project_page().is_displayed()
+    # Read the PIN first, so a missing PIN fails here rather than halfway through the login
+    pin = config.get_pin()
+    project_page = context.pages.project
+
+    # Reuse the login captured earlier in the run unless the scenario asks for the real flow (@real_login)
+    session_cache = context.session_cache if "real_login" not in context.tags else None
+    # Parallel workers share the snapshot: one logs in while the others wait here, then restore its login
+    with session_cache.login_lock() if session_cache else nullcontext():
+        if session_cache and session_cache.restore(context.driver):
+            context.pages.invalidate()  # Restoring the session navigated to the project page
+            if project_page.is_displayed(*project_page.PROJECT_PAGE, timeout=config.SESSION_RESTORE_TIMEOUT):
+                return
+            # The application rejected the cached session: forget it and log in for real from the login page
+            session_cache.invalidate()
+            context.driver.get(config.BASE_URL)
+            context.pages.invalidate()
+
+        # Call the login method from the LoginPage class and pass the PIN
+        context.pages.login.login(str(pin))
+        # Assert that the project page is displayed after successful login
+        assert project_page.get_project_page().is_displayed()
+
+        # Keep this login for the following scenarios
+        if context.session_cache:
+            context.session_cache.capture(context.driver)
 
 # Step for navigating to the Test Automation Project
 @when('I navigate to the Test Automation Project')
 def step_impl(context):
-    # Reinitialize the ProjectPage class for navigation
-    context.project_page = ProjectPage(context.driver)
+    project_page = context.pages.project
     # Assert that the project page is displayed
-    assert context.project_page.get_project_page().is_displayed()
+    assert project_page.get_project_page().is_displayed()
     # Open the Test Automation Project from the ProjectPage
-    context.project_page.open_test_automation_project()
+    project_page.open_test_automation_project()
 
 # Step for switching to the 'Details' tab of the project
 @when('I switch to the Details tab')
 def step_impl(context):
-    # Reinitialize the ProjectPage class for interacting with the project
-    context.project_page = ProjectPage(context.driver)
+    project_page = context.pages.project
     # Assert that the Details tab is displayed
-    assert context.project_page.get_details_tab().is_displayed()
+    assert project_page.get_details_tab().is_displayed()
     # Switch to the Details tab
-    context.project_page.switch_to_details_tab()
-    # Wait for the page to load after switching tabs
-    time.sleep(5)
+    project_page.switch_to_details_tab()
+    # Wait until the Details tab is shown as selected instead of sleeping
+    project_page.wait_for_details_loaded()
 
 # Step for returning to the 'Videos' tab of the project
 @when('I return to the Videos tab')
 def step_impl(context):
-    # Reinitialize the ProjectPage class for interacting with the project
-    context.project_page = ProjectPage(context.driver)
+    project_page = context.pages.project
     # Assert that the Videos tab is displayed
-    assert context.project_page.get_videos_tab().is_displayed()
+    assert project_page.get_videos_tab().is_displayed()
     # Switch to the Videos tab
-    context.project_page.switch_to_videos_tab()
+    project_page.switch_to_videos_tab()
 
 # Step for playing the video
 @when('I play the video')
 def step_impl(context):
-    # Initialize the VideoPage class to interact with the video player
-    context.video_page = VideoPage(context.driver)
+    # Get the session's VideoPage to interact with the video player
+    video_page = context.pages.video
     # Call the play_video method from the VideoPage class to start the video
-    context.video_page.play_video()
-    # Wait for 10 seconds to allow the video to play for a brief period
-    time.sleep(10)
+    video_page.play_video()
+    # Wait for the video to actually play for a brief period
+    video_page.wait_for_playback_to_advance(config.PLAYBACK_SECONDS)
+    # Check how well it started and played: startup time, rebuffering and dropped frames
+    check_qoe(context, video_page, ("startup_ms", "rebuffer_count", "rebuffer_ms", "dropped_ratio"))
 
 # Step for pausing the video
 @when('I pause the video')
+@command_budget(15)
 def step_impl(context):
-    # Initialize the VideoPage class and pause the video
-    context.video_page = VideoPage(context.driver)
-    context.video_page.pause_video()
-    # Wait for 2 seconds before performing the next action
-    time.sleep(2)
+    # Use the session's VideoPage to pause the video
+    video_page = context.pages.video
+    # pause_video returns once the video element reports it is paused
+    video_page.pause_video()
+    # Assert that the player itself reports the paused state
+    assert video_page.get_player_state()["state"] == "paused"
 
 # Step for continuing the video from the pause state
 @when('I continue watching the video')
+@command_budget(10)
 def step_impl(context):
-    # Initialize the VideoPage class and continue watching the video
-    context.video_page = VideoPage(context.driver)
-    context.video_page.continue_watching()
+    # Use the session's VideoPage to continue watching the video
+    video_page = context.pages.video
+    video_page.continue_watching()
 
 # Step for adjusting the volume to 50%
 @when('I adjust the volume to 50%')
+@command_budget(45)
 def step_impl(context):
-    # Initialize the VideoPage class and adjust the volume
-    context.video_page = VideoPage(context.driver)
-    context.video_page.adjust_volume()
+    # Use the session's VideoPage to adjust the volume
+    video_page = context.pages.video
+    video_page.adjust_volume()
+    # Assert that the player reports an unmuted 50% volume
+    state = video_page.get_player_state()
+    assert state["volume"] == 50 and not state["muted"], \
+        f"Expected the volume to be 50% and unmuted, got {state['volume']}% (muted: {state['muted']})"
 
 # Step for changing video resolution to 480p, then back to 720p
 @when('I change the resolution to 480p and back to 720p')
+@command_budget(40)
 def step_impl(context):
-    # Initialize the VideoPage class and change the resolution
-    context.video_page = VideoPage(context.driver)
-    context.video_page.change_resolution('480p')
-    # Wait for 2 seconds before switching resolution again
-    time.sleep(2)
+    # Use the session's VideoPage to change the resolution
+    video_page = context.pages.video
+    # change_resolution returns once the player reports the new quality level
+    video_page.change_resolution('480p')
+    quality = video_page.get_player_state()["quality"]
+    assert quality == '480p', f"Expected the quality to be 480p, got {quality}"
+    if context.qoe_mode != "off":
+        video_page.wait_for_quality_rendered('480p')  # Let the switch complete, so its time-to-switch is measured
     # Change the resolution back to 720p
-    context.video_page.change_resolution('720p')
+    video_page.change_resolution('720p')
+    quality = video_page.get_player_state()["quality"]
+    assert quality == '720p', f"Expected the quality to be 720p, got {quality}"
+    if context.qoe_mode != "off":
+        video_page.wait_for_quality_rendered('720p')
+    # Check the time-to-switch of both changes and that they did not stall playback
+    check_qoe(context, video_page, ("switch_ms", "rebuffer_count", "rebuffer_ms", "dropped_ratio"), switches=('480p', '720p'))
 
 # Step for pausing the video and navigating back
 @when('I pause the video and navigate back')
 def step_impl(context):
-    # Initialize the VideoPage class, pause the video, and navigate back to the previous page
-    context.video_page = VideoPage(context.driver)
-    context.video_page.pause_video()
-    context.video_page.navigate_back()
+    # Use the session's VideoPage to pause the video, and navigate back to the previous page
+    video_page = context.pages.video
+    video_page.pause_video()
+    video_page.navigate_back()
     # Assert that the project page is displayed after navigating back
-    assert context.project_page.get_project_page().is_displayed()
+    assert context.pages.project.get_project_page().is_displayed()
 
 # Step for logging out from the application
 @when('I log out')
 def step_impl(context):
-    # Initialize the VideoPage class and call the logout method
-    context.video_page = VideoPage(context.driver)
-    context.video_page.logout()
+    # Use the session's VideoPage to call the logout method
+    video_page = context.pages.video
+    video_page.logout()
 
 # Step for verifying that the user is logged out successfully
 @then('I should see the logout successful')
 def step_impl(context):
-    # Initialize the LogoutPage class and verify that the login page is visible again
-    context.logout_page = LogoutPage(context.driver)
-    context.logout_page.verify_login_page()
-    # Close the browser after the verification is done
-    context.logout_page.close_browser()
+    # Verify that the login page is visible again
+    context.pages.logout.verify_login_page()
+    # The browser is not closed here: after_scenario resets it and returns it to the driver pool
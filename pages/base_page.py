@@ -1,14 +1,44 @@
 # base_page.py (Base class for shared logic)
 # This is the base page class that all page objects will inherit.
 # It includes common functionality like waiting for elements, finding elements, and clicking actions.
+# Elements are cached per driver by locator and shared by its page objects, so a wait followed by a click resolves the locator only once.
+# The frame each driver is in is tracked, so switching to the frame it is already in costs no WebDriver command.
+# Waits either poll the condition (config.WAIT_ENGINE = "poll") or block in the page until an event makes it hold ("event").
 
+import weakref  # Importing weakref so the frame tracking does not keep drivers alive.
+from contextlib import contextmanager  # Importing contextmanager for the "inside a frame" API.
 from selenium.webdriver.common.by import By  # Importing 'By' to locate elements using different strategies.
 from selenium.webdriver.support.ui import WebDriverWait  # Importing WebDriverWait to wait for elements to appear.
 from selenium.webdriver.support import expected_conditions as EC  # Importing expected conditions for element interaction.
 from selenium.webdriver.common.keys import Keys  # Importing Keys for keyboard interactions.
 from selenium.webdriver.common.action_chains import ActionChains  # Importing ActionChains for complex user interactions.
+from selenium.common.exceptions import TimeoutException, StaleElementReferenceException, WebDriverException  # Importing exceptions for failed waits, outdated cached elements and interrupted event waits.
+import time  # Importing time to measure how long waits take.
+from support.tracing import get_tracer  # Importing the tracer that records wait and action timings.
+from support.adaptive_timeouts import get_latency_stats  # Importing the learned per-wait timeouts.
+from pages.conditions import ElementAttached, ElementClickable, ElementsClickable, RESOLVE_LOCATORS_JS  # Importing conditions and the batched locator script.
+from pages.event_waits import supports_events, wait_for_event  # Importing the event-driven wait engine.
+import config  # Importing the config file for default timeouts and polling intervals.
+
+# Locator of the frame each driver is currently switched to (None or missing means the top-level document)
+frame_contexts = weakref.WeakKeyDictionary()
+# WebElements already resolved on each driver's current document, keyed by (by, value)
+element_caches = weakref.WeakKeyDictionary()
+
+
+def reset_frame_context(driver):
+    """
+    Records that a driver is back on the top-level document, e.g. after a navigation or a session reset.
+    The elements cached for the driver belong to the old document and are forgotten.
+    """
+    frame_contexts[driver] = None
+    element_caches.pop(driver, None)
+
 
 class BasePage:
+    # Wait engine of this page's waits: "poll" or "event"; None follows config.WAIT_ENGINE
+    wait_engine = None
+
     def __init__(self, driver):
         """
         Initializes the BasePage object, which is inherited by other page objects.
@@ -17,19 +47,213 @@ class BasePage:
         """
         self.driver = driver  # Store the driver reference to interact with the page elements.
 
-    def wait_for_element(self, by, value, timeout=15):
+    @property
+    def element_cache(self):
+        """
+        WebElements already resolved on this driver, keyed by (by, value). Shared by every page object of the driver.
+        """
+        return element_caches.setdefault(self.driver, {})
+
+    def invalidate_cache(self):
+        """
+        Forgets every cached element. Call it after a navigation or a frame switch, since the cached elements belong to the old document.
+        """
+        element_caches.pop(self.driver, None)
+
+    def wait_for_element(self, by, value, timeout=None, poll_frequency=None):
         """
         Waits for an element to be clickable, which means it is both visible and enabled.
 
         :param by: The method to locate the element (e.g., By.ID, By.XPATH).
         :param value: The value to use with the 'by' locator (e.g., element ID or XPath).
-        :param timeout: Time (in seconds) to wait for the element to become clickable (default is 10 seconds).
+        :param timeout: Time (in seconds) to wait for the element to become clickable (defaults to the
+                        learned timeout when adaptive timeouts are on, else config.ELEMENT_TIMEOUT).
+        :param poll_frequency: Seconds between two checks (defaults to config.POLL_FREQUENCY).
         :return: The WebElement that becomes clickable.
         """
-        # Wait until the element is clickable using WebDriverWait
-        return WebDriverWait(self.driver, timeout).until(
-            EC.element_to_be_clickable((by, value))  # Check if the element is clickable.
+        # A cached element only needs its clickable state checked, not to be found again
+        cached = self.element_cache.get((by, value))
+        if cached is not None:
+            try:
+                if cached.is_displayed() and cached.is_enabled():
+                    return cached
+            except StaleElementReferenceException:
+                del self.element_cache[(by, value)]  # The page changed since the element was cached
+
+        # Wait until the element is clickable, with the configured wait engine
+        element = self.wait_until(
+            ElementClickable(by, value),  # Check if the element is clickable.
+            timeout=timeout,
+            poll_frequency=poll_frequency,
+            description=f"element {(by, value)} to be clickable",
+            default_timeout=config.ELEMENT_TIMEOUT,
         )
+        self.element_cache[(by, value)] = element
+        return element
+
+    def wait_for_elements(self, locators, timeout=None):
+        """
+        Waits for several elements to be clickable, checking all of them in a single round trip per poll.
+
+        :param locators: List of (by, value) tuples.
+        :param timeout: Time (in seconds) to wait (defaults to config.TIMEOUT).
+        :return: The WebElements, in the order of the locators.
+        """
+        elements = self.wait_until(ElementsClickable(locators), timeout=timeout)
+        self.element_cache.update(zip(map(tuple, locators), elements))
+        return elements
+
+    def find_elements_batch(self, locators):
+        """
+        Finds several elements with one execute_script call instead of one find_element call each.
+
+        :param locators: List of (by, value) tuples.
+        :return: List of WebElements, with None for locators that matched nothing.
+        """
+        results = self.driver.execute_script(RESOLVE_LOCATORS_JS, [list(locator) for locator in locators])
+        elements = [element for element, _, _ in results]
+        self.element_cache.update((tuple(locator), element) for locator, element in zip(locators, elements) if element is not None)
+        return elements
+
+    def wait_until(self, condition, timeout=None, poll_frequency=None, description=None, default_timeout=None):
+        """
+        Waits until a condition holds and returns its result, instead of sleeping for a fixed time.
+
+        :param condition: A callable taking the driver (e.g. from pages.conditions or expected_conditions).
+        :param timeout: Time (in seconds) to wait for the condition. When not given, it comes from
+                        config.TIMEOUT_OVERRIDES, then from the learned timeouts, then default_timeout.
+        :param poll_frequency: Seconds between two checks (defaults to config.POLL_FREQUENCY); not used by the event engine.
+        :param description: Human readable condition used in the timeout error (defaults to str(condition)).
+        :param default_timeout: Timeout used when nothing else applies (defaults to config.TIMEOUT).
+        :return: The first truthy value returned by the condition.
+        :raises TimeoutException: If the condition does not hold within the timeout.
+        """
+        poll_frequency = config.POLL_FREQUENCY if poll_frequency is None else poll_frequency
+        description = description or str(condition)
+        latency_stats = get_latency_stats()
+        learn = timeout is None and latency_stats is not None  # Explicit timeouts are not learned
+        if timeout is None:
+            timeout = config.TIMEOUT if default_timeout is None else default_timeout
+            if description in config.TIMEOUT_OVERRIDES:
+                timeout = config.TIMEOUT_OVERRIDES[description]  # Known-slow wait
+            elif latency_stats is not None:
+                timeout = latency_stats.timeout_for(description, timeout)
+
+        # Count how many times the condition is checked, for the timing trace
+        polls = 0
+
+        def counted_condition(driver):
+            nonlocal polls
+            polls += 1
+            return condition(driver)
+
+        # The message ends up in the TimeoutException, so a failing run says what it was waiting for
+        message = f"Timed out after {timeout}s waiting for {description}"
+        engine = self.wait_engine or config.WAIT_ENGINE
+        if engine == "event" and not supports_events(condition):
+            engine = "poll"  # E.g. frame switches, which only WebDriver can check
+
+        with get_tracer().span("wait", description, timeout=timeout, engine=engine) as trace:
+            started = time.perf_counter()
+            try:
+                if engine == "event":
+                    polls = 1
+                    try:
+                        # One execute_async_script call that returns when the condition holds in the page
+                        result = wait_for_event(self.driver, condition, timeout, config.WAIT_EVENT_RECHECK, message)
+                    except TimeoutException:
+                        raise
+                    except WebDriverException:
+                        # The page navigated away during the wait: poll for the time that is left
+                        trace["fallback"] = True
+                        engine = "poll"
+                if engine == "poll":
+                    remaining = max(timeout - (time.perf_counter() - started), 0)
+                    result = WebDriverWait(self.driver, remaining, poll_frequency=poll_frequency).until(
+                        counted_condition, message=message
+                    )
+            finally:
+                trace["polls"] = polls
+            if learn:
+                latency_stats.record(description, time.perf_counter() - started)
+            return result
+
+    def wait_for_presence(self, by, value, timeout=None):
+        """
+        Waits for an element to be attached to the DOM, whether or not it is visible yet.
+
+        :param by: The method to locate the element (e.g., By.ID, By.XPATH).
+        :param value: The value to use with the 'by' locator (e.g., element ID or XPath).
+        :param timeout: Time (in seconds) to wait (defaults to config.TIMEOUT).
+        :return: The attached WebElement.
+        """
+        return self.wait_until(ElementAttached(by, value), timeout=timeout)
+
+    def is_displayed(self, by, value, timeout=None):
+        """
+        Checks whether an element becomes clickable within the timeout, without raising if it does not.
+
+        :param by: The method to locate the element (e.g., By.ID, By.XPATH).
+        :param value: The value to use with the 'by' locator (e.g., element ID or XPath).
+        :param timeout: Time (in seconds) to wait (defaults to config.TIMEOUT).
+        :return: True if the element became clickable, False otherwise.
+        """
+        try:
+            self.wait_for_element(by, value, timeout=config.TIMEOUT if timeout is None else timeout)
+            return True
+        except TimeoutException:
+            return False
+
+    @property
+    def current_frame(self):
+        """
+        The (by, value) locator of the frame the driver is in, or None on the top-level document.
+        """
+        return frame_contexts.get(self.driver)
+
+    def switch_to_frame(self, by, value, timeout=None):
+        """
+        Switches into a frame of the top-level document, unless the driver is already inside it.
+
+        :param by: The method to locate the frame element (e.g., By.ID, By.XPATH).
+        :param value: The value to use with the 'by' locator.
+        :param timeout: Time (in seconds) to wait for the frame (defaults to config.TIMEOUT).
+        """
+        if self.current_frame == (by, value):
+            return  # Already inside: no wait and no switch needed
+        if self.current_frame is not None:
+            self.driver.switch_to.default_content()
+        # Waits for the frame and switches to it in the same check
+        self.wait_until(EC.frame_to_be_available_and_switch_to_it((by, value)), timeout=timeout,
+                        description=f"frame {(by, value)} to be available")
+        frame_contexts[self.driver] = (by, value)
+        self.invalidate_cache()  # Elements cached so far belong to the other document
+
+    def switch_to_default_content(self):
+        """
+        Switches back to the top-level document, unless the driver is already there.
+        """
+        if self.current_frame is None:
+            return
+        self.driver.switch_to.default_content()
+        frame_contexts[self.driver] = None
+        self.invalidate_cache()
+
+    @contextmanager
+    def in_frame(self, by, value):
+        """
+        Runs the enclosed block inside a frame and returns to the previous frame context afterwards.
+        Switches happen only when the context really changes.
+        """
+        previous = self.current_frame
+        self.switch_to_frame(by, value)
+        try:
+            yield
+        finally:
+            if previous is None:
+                self.switch_to_default_content()
+            else:
+                self.switch_to_frame(*previous)
 
     def find_element(self, by, value):
         """
@@ -39,7 +263,17 @@ class BasePage:
         :param value: The value to use with the 'by' locator (e.g., element ID or XPath).
         :return: The WebElement object that matches the locator.
         """
-        return self.driver.find_element(by, value)  # Return the WebElement matching the provided locator.
+        # A cached element is only returned while it is still attached to the page (one cheap command)
+        element = self.element_cache.get((by, value))
+        if element is not None:
+            try:
+                element.is_enabled()
+                return element
+            except StaleElementReferenceException:
+                del self.element_cache[(by, value)]  # The page changed since the element was cached
+        element = self.driver.find_element(by, value)  # Find the WebElement matching the provided locator.
+        self.element_cache[(by, value)] = element
+        return element
 
     def click(self, by, value):
         """
@@ -49,7 +283,14 @@ class BasePage:
         :param value: The value to use with the 'by' locator (e.g., element ID or XPath).
         """
         # Wait for the element to become clickable and then click on it
-        self.wait_for_element(by, value).click()  # Click the element once it is clickable.
+        element = self.wait_for_element(by, value)
+        with get_tracer().span("click", f"{by}={value}"):
+            try:
+                element.click()  # Click the element once it is clickable.
+            except StaleElementReferenceException:
+                # The element was re-rendered between the wait and the click: resolve it again once
+                self.element_cache.pop((by, value), None)
+                self.wait_for_element(by, value).click()
 
     def send_keys(self, by, value, keys):
         """
@@ -59,7 +300,14 @@ class BasePage:
         :param value: The value to use with the 'by' locator (e.g., element ID or XPath).
         :param keys: The keys or text to be sent to the element.
         """
-        # Locate the element using the provided 'by' and 'value'
-        element = self.find_element(by, value)
-        element.clear()  # Clear the text input field before sending keys (if it is a text field)
-        element.send_keys(keys)  # Send the provided keys or text to the element.
+        with get_tracer().span("send_keys", f"{by}={value}"):
+            # Locate the element using the provided 'by' and 'value'
+            element = self.find_element(by, value)
+            try:
+                element.clear()  # Clear the text input field before sending keys (if it is a text field)
+            except StaleElementReferenceException:
+                # The cached element is outdated: resolve it again once
+                self.element_cache.pop((by, value), None)
+                element = self.find_element(by, value)
+                element.clear()
+            element.send_keys(keys)  # Send the provided keys or text to the element.
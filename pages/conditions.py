@@ -0,0 +1,301 @@
+'''
+conditions.py (Wait conditions)
+Callable conditions for BasePage.wait_until, in the same shape as Selenium's expected_conditions:
+each one is called with the driver and returns a truthy value once the condition holds.
+The video conditions read the JW Player <video> element, so they must be waited on from inside the video iframe.
+Conditions with `watch` and `event_script()` can also be waited on by the event engine (see pages/event_waits.py).
+'''
+
+from selenium.webdriver.support import expected_conditions as EC
+
+# Script resolving a list of [by, value] locators in one round trip; returns [element or null, visible, enabled] per locator.
+# "Visible" follows Selenium's isDisplayed (used by element_to_be_clickable), so the poll and event engines agree:
+# a non-empty box, not visibility:hidden/collapse, and neither the element nor an ancestor display:none or opacity 0
+# (JW Player hides its idle controls that way).
+RESOLVE_LOCATORS_JS = """
+function isShown(element) {
+    var style = window.getComputedStyle(element);
+    if (style.visibility === 'hidden' || style.visibility === 'collapse') { return false; }  // Inherited by the children
+    for (var node = element; node && node.nodeType === 1; node = node.parentElement) {
+        var nodeStyle = node === element ? style : window.getComputedStyle(node);
+        if (nodeStyle.display === 'none' || parseFloat(nodeStyle.opacity) === 0) { return false; }
+    }
+    var rect = element.getBoundingClientRect();
+    return rect.width > 0 && rect.height > 0;
+}
+return arguments[0].map(function (locator) {
+    var by = locator[0], value = locator[1], element = null;
+    try {
+        if (by === 'xpath') {
+            element = document.evaluate(value, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+        } else if (by === 'id') {
+            element = document.getElementById(value);
+        } else if (by === 'css selector') {
+            element = document.querySelector(value);
+        } else if (by === 'name') {
+            element = document.getElementsByName(value)[0] || null;
+        } else if (by === 'class name') {
+            element = document.getElementsByClassName(value)[0] || null;
+        } else if (by === 'tag name') {
+            element = document.getElementsByTagName(value)[0] || null;
+        }
+    } catch (e) {}
+    if (!element) { return [null, false, false]; }
+    return [element, isShown(element), !element.disabled];
+});
+"""
+
+# Check (for the event engine) returning the elements of the [by, value] locators in arguments[0] once all are clickable
+ELEMENTS_CLICKABLE_JS = """
+var results = (function () {""" + RESOLVE_LOCATORS_JS + """}).apply(null, arguments);
+for (var i = 0; i < results.length; i++) {
+    if (!results[i][0] || !results[i][1] || !results[i][2]) { return null; }
+}
+return results.map(function (result) { return result[0]; });
+"""
+
+# Check (for both engines) that the tab of the [by, value] locator in arguments[0] is the selected one: it (or a
+# wrapper such as its <li>) is marked aria-selected="true" or with an active/selected/current class, or the panel
+# it controls (aria-controls) is shown. Single-page tab switches change no readyState, so this is what shows the switch.
+TAB_SELECTED_JS = """
+var tab = (function () {""" + RESOLVE_LOCATORS_JS + """}).apply(null, [[arguments[0]]])[0][0];
+if (!tab) { return false; }
+function marked(node) {
+    var className = typeof node.className === 'string' ? node.className : node.getAttribute('class') || '';
+    return node.getAttribute('aria-selected') === 'true' || /(^|[\\s_-])(active|selected|current)($|[\\s_-])/i.test(className);
+}
+if (marked(tab) || (tab.parentElement && marked(tab.parentElement))) { return true; }
+var panel = tab.getAttribute('aria-controls') && document.getElementById(tab.getAttribute('aria-controls'));
+return !!(panel && panel.getBoundingClientRect().height > 0 && window.getComputedStyle(panel).visibility !== 'hidden');
+"""
+
+# Script returning the JW Player <video> element of the current frame (or null while it is not rendered yet)
+VIDEO_ELEMENT_JS = "var video = document.querySelector('video.jw-video') || document.querySelector('video');"
+
+
+class DocumentReady:
+    """Holds once the current document has finished loading."""
+
+    watch = {"document": ["readystatechange"]}
+
+    def __call__(self, driver):
+        return driver.execute_script("return document.readyState;") == "complete"
+
+    def event_script(self):
+        return "return document.readyState === 'complete';", []
+
+    def __str__(self):
+        return "document.readyState to be 'complete'"
+
+
+class ElementAttached:
+    """Holds once an element matching the locator is present in the DOM (visible or not)."""
+
+    watch = {"dom": True}
+
+    def __init__(self, by, value):
+        self.locator = (by, value)
+
+    def __call__(self, driver):
+        return EC.presence_of_element_located(self.locator)(driver)
+
+    def event_script(self):
+        return "return (function () {" + RESOLVE_LOCATORS_JS + "}).apply(null, arguments)[0][0];", [[list(self.locator)]]
+
+    def __str__(self):
+        return f"element {self.locator} to be attached to the DOM"
+
+
+class ElementClickable:
+    """Holds once an element matching the locator is visible and enabled; returns the element."""
+
+    watch = {"dom": True}
+
+    def __init__(self, by, value):
+        self.locator = (by, value)
+
+    def __call__(self, driver):
+        return EC.element_to_be_clickable(self.locator)(driver)
+
+    def event_script(self):
+        return "var elements = (function () {" + ELEMENTS_CLICKABLE_JS + "}).apply(null, arguments); return elements && elements[0];", \
+            [[list(self.locator)]]
+
+    def __str__(self):
+        return f"element {self.locator} to be clickable"
+
+
+class ElementsClickable:
+    """Holds once every locator resolves to a visible, enabled element; checks them all in one execute_script call."""
+
+    watch = {"dom": True}
+
+    def __init__(self, locators):
+        self.locators = [list(locator) for locator in locators]
+
+    def __call__(self, driver):
+        results = driver.execute_script(RESOLVE_LOCATORS_JS, self.locators)
+        if all(element is not None and visible and enabled for element, visible, enabled in results):
+            return [element for element, _, _ in results]
+        return False
+
+    def event_script(self):
+        return ELEMENTS_CLICKABLE_JS, [self.locators]
+
+    def __str__(self):
+        return f"elements {[tuple(locator) for locator in self.locators]} to be clickable"
+
+
+class TabSelected:
+    """Holds once the tab matching the locator is the selected one (see TAB_SELECTED_JS)."""
+
+    watch = {"dom": True}
+
+    def __init__(self, by, value):
+        self.locator = [by, value]
+
+    def __call__(self, driver):
+        return driver.execute_script(TAB_SELECTED_JS, self.locator)
+
+    def event_script(self):
+        return TAB_SELECTED_JS, [self.locator]
+
+    def __str__(self):
+        return f"tab {tuple(self.locator)} to be selected"
+
+
+class VideoTimeAdvanced:
+    """Holds once the video's currentTime has advanced by `seconds` since the first check."""
+
+    watch = {"dom": True, "media": ["timeupdate"]}
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.start_time = None  # currentTime seen on the first check
+
+    def __call__(self, driver):
+        current_time = driver.execute_script(VIDEO_ELEMENT_JS + "return video ? video.currentTime : null;")
+        if current_time is None:
+            return False
+        if self.start_time is None:
+            self.start_time = current_time
+        return current_time - self.start_time >= self.seconds
+
+    def event_script(self):
+        # The first check's currentTime is kept on `this`, which lives for the whole wait
+        return VIDEO_ELEMENT_JS + """
+if (!video) { return false; }
+if (this.start === undefined) { this.start = video.currentTime; }
+return video.currentTime - this.start >= arguments[0];
+""", [self.seconds]
+
+    def __str__(self):
+        return f"video currentTime to advance by {self.seconds}s"
+
+
+class VideoPlaying:
+    """
+    Holds once the video element is playing and has rendered past its first frame.
+    `prelude` is script run before every check in the same call (e.g. to install a collector).
+    """
+
+    watch = {"dom": True, "media": ["playing", "timeupdate"]}
+
+    def __init__(self, prelude=""):
+        self.prelude = prelude
+
+    def __call__(self, driver):
+        script, _ = self.event_script()
+        return driver.execute_script(script)
+
+    def event_script(self):
+        return self.prelude + VIDEO_ELEMENT_JS + "return !!video && !video.paused && video.currentTime > 0;", []
+
+    def __str__(self):
+        return "video to start playing"
+
+
+class VideoPaused:
+    """Holds once the video element reports `paused`."""
+
+    watch = {"dom": True, "media": ["pause", "ratechange"]}
+
+    def __call__(self, driver):
+        return driver.execute_script(VIDEO_ELEMENT_JS + "return video ? video.paused : false;")
+
+    def event_script(self):
+        return VIDEO_ELEMENT_JS + "return video ? video.paused : false;", []
+
+    def __str__(self):
+        return "video to be paused"
+
+
+class VideoVolumeEquals:
+    """Holds once the video element's volume (0.0 - 1.0) equals the expected level."""
+
+    watch = {"dom": True, "media": ["volumechange"]}
+
+    def __init__(self, volume, tolerance=0.01):
+        self.volume = volume
+        self.tolerance = tolerance
+
+    def __call__(self, driver):
+        volume = driver.execute_script(VIDEO_ELEMENT_JS + "return video ? video.volume : null;")
+        return volume is not None and abs(volume - self.volume) <= self.tolerance
+
+    def event_script(self):
+        return VIDEO_ELEMENT_JS + "return !!video && Math.abs(video.volume - arguments[0]) <= arguments[1];", \
+            [self.volume, self.tolerance]
+
+    def __str__(self):
+        return f"video volume to equal {self.volume:.0%}"
+
+
+class ActiveQualityEquals:
+    """Holds once JW Player's current quality level has the expected label (e.g. '480p')."""
+
+    watch = {"player": ["levelsChanged", "visualQuality"]}
+
+    def __init__(self, label):
+        self.label = label
+
+    def __call__(self, driver):
+        label = driver.execute_script(
+            "if (!window.jwplayer) { return null; }"
+            "var player = jwplayer();"
+            "var level = player.getQualityLevels()[player.getCurrentQuality()];"
+            "return level ? level.label : null;"
+        )
+        return label == self.label
+
+    def event_script(self):
+        return ("if (!window.jwplayer) { return false; }"
+                "var player = jwplayer();"
+                "var level = player.getQualityLevels()[player.getCurrentQuality()];"
+                "return !!level && level.label === arguments[0];"), [self.label]
+
+    def __str__(self):
+        return f"active quality level to be {self.label}"
+
+
+class QualityRendered:
+    """
+    Holds once the QoE collector (see pages/video_page.py) has seen JW Player render the requested
+    quality, i.e. the last requested switch has completed and was to the expected label.
+    """
+
+    watch = {"player": ["visualQuality"]}
+
+    def __init__(self, label):
+        self.label = label
+
+    def __call__(self, driver):
+        script, script_args = self.event_script()
+        return driver.execute_script(script, *script_args)
+
+    def event_script(self):
+        return ("var qoe = window.__qoe; if (!qoe || qoe.pendingSwitch || !qoe.switches.length) { return false; }"
+                "return qoe.switches[qoe.switches.length - 1].label === arguments[0];"), [self.label]
+
+    def __str__(self):
+        return f"quality {self.label} to be rendered"
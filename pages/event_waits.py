@@ -0,0 +1,119 @@
+'''
+event_waits.py (Event-driven wait engine)
+With config.WAIT_ENGINE = "event" (or '-D wait_engine=event'), BasePage.wait_until blocks in a single
+execute_async_script call instead of sending a WebDriver command every poll. The condition's check
+runs in the page: once at the start, then whenever something it depends on may have changed:
+  dom     a MutationObserver on the document (elements added, removed, re-styled or re-labelled)
+  media   media events of any <video>/<audio> element (captured at document level, so elements
+          rendered later are covered too), e.g. playing, pause, timeupdate, volumechange
+  player  JW Player API events, e.g. levelsChanged, visualQuality
+  document  events of the document itself, e.g. readystatechange
+A slow in-page re-check (config.WAIT_EVENT_RECHECK) covers changes no event reports (e.g. layout
+after a stylesheet loads); it sends no WebDriver command.
+
+Conditions opt in by providing `watch` (the dict above) and `event_script()`, which returns the check
+as a JavaScript function body (its arguments are passed as arguments[0..n]; `this` is an object kept
+for the whole wait, for conditions that compare against their first check) and its arguments.
+Conditions without them (e.g. frame switches) are polled as before.
+'''
+
+import weakref
+
+from selenium.common.exceptions import TimeoutException, WebDriverException
+
+# Script timeout set on each driver, so it is only changed when a longer wait needs it
+script_timeouts = weakref.WeakKeyDictionary()
+
+# Extra seconds the script timeout is given over the wait, so the in-page timeout always fires first
+SCRIPT_TIMEOUT_MARGIN = 5
+
+# arguments: [check arguments], watch, timeout (ms), re-check interval (ms), done callback.
+# The check function is defined in front of this body by event_wait_script.
+EVENT_WAIT_JS = """
+var checkArgs = arguments[0], watch = arguments[1], timeoutMs = arguments[2], recheckMs = arguments[3];
+var done = arguments[arguments.length - 1];
+var state = {}, finished = false, observer = null, timer = null, recheck = null, player = null;
+function finish(value) {
+    if (finished) { return; }
+    finished = true;
+    if (observer) { observer.disconnect(); }
+    (watch.media || []).forEach(function (name) { document.removeEventListener(name, evaluate, true); });
+    (watch.document || []).forEach(function (name) { document.removeEventListener(name, evaluate, true); });
+    if (player && player.off) { (watch.player || []).forEach(function (name) { player.off(name, evaluate); }); }
+    clearTimeout(timer);
+    clearInterval(recheck);
+    done(value);
+}
+function evaluate() {
+    if (finished) { return; }
+    try {
+        var result = check.apply(state, checkArgs);
+        if (result) { finish({value: result}); }
+    } catch (error) {
+        finish({error: String(error)});
+    }
+}
+evaluate();
+if (!finished) {
+    if (watch.dom) {
+        observer = new MutationObserver(evaluate);
+        observer.observe(document, {subtree: true, childList: true, attributes: true, characterData: true});
+    }
+    // Media events do not bubble, but they can be captured on the document
+    (watch.media || []).forEach(function (name) { document.addEventListener(name, evaluate, true); });
+    (watch.document || []).forEach(function (name) { document.addEventListener(name, evaluate, true); });
+    if (watch.player && window.jwplayer) {
+        try {
+            player = jwplayer();
+            watch.player.forEach(function (name) { player.on(name, evaluate); });
+        } catch (error) { player = null; }
+    }
+    recheck = setInterval(evaluate, recheckMs);
+    timer = setTimeout(function () { finish(null); }, timeoutMs);
+}
+"""
+
+
+def supports_events(condition):
+    """
+    True if the condition can be waited on with the event engine.
+    """
+    return hasattr(condition, "event_script") and hasattr(condition, "watch")
+
+
+def event_wait_script(check_script):
+    return "function check() {\n" + check_script + "\n}\n" + EVENT_WAIT_JS
+
+
+def ensure_script_timeout(driver, timeout):
+    """
+    Makes sure an async script may run for `timeout` seconds (plus a margin) on this driver.
+    """
+    needed = timeout + SCRIPT_TIMEOUT_MARGIN
+    if script_timeouts.get(driver, 0) < needed:
+        driver.set_script_timeout(needed)
+        script_timeouts[driver] = needed
+
+
+def wait_for_event(driver, condition, timeout, recheck, message):
+    """
+    Blocks in one execute_async_script call until the condition holds in the page.
+
+    :param condition: A condition providing `watch` and `event_script()`.
+    :param timeout: Seconds to wait.
+    :param recheck: Seconds between two in-page re-checks.
+    :param message: Message of the TimeoutException raised when the condition does not hold in time.
+    :return: The condition's result (e.g. the element).
+    :raises TimeoutException: If the condition does not hold within the timeout.
+    :raises WebDriverException: If the page navigated away during the wait (the caller falls back to polling).
+    """
+    check_script, check_args = condition.event_script()
+    ensure_script_timeout(driver, timeout)
+    outcome = driver.execute_async_script(
+        event_wait_script(check_script), list(check_args), condition.watch, int(timeout * 1000), int(recheck * 1000)
+    )
+    if outcome is None:
+        raise TimeoutException(message)
+    if "error" in outcome:
+        raise WebDriverException(f"Event wait check failed: {outcome['error']}")
+    return outcome["value"]
@@ -1,49 +1,33 @@
 from selenium.webdriver.common.by import By
 from pages.base_page import BasePage
-from dotenv import load_dotenv
-import os
 
-# Load environment variables from the .env file
-load_dotenv()
-
-# Retrieve the PIN from the environment variables
-pin = os.getenv("MY_PIN")
+class LoginPage(BasePage):
+    # Locators are class-level constants, so creating a LoginPage does not rebuild them
 
-# Raise an error if the PIN is not found in the environment variables
-if not pin:
-    raise ValueError("PIN not found in .env file.")
-    
+    # Locator for the input field where users enter their PIN
+    PIN_INPUT = (By.ID, "access-code")
 
-class LoginPage(BasePage):
-    def __init__(self, driver):
-        """
-        Initializes the LoginPage object with WebDriver instance and locators for elements on the login page.
-        
-        :param driver: Selenium WebDriver instance to interact with the browser.
-        """
-        super().__init__(driver)  # Initialize the parent class (BasePage)
+    # Locators for the logo and the "Sign In" button on the login page
+    LOGO = (By.XPATH, "//img[@id='form-logo-image']")
+    LOGIN_BUTTON = (By.XPATH, "//div//span[text()='Sign In']")
 
-        # Locator for the input field where users enter their PIN
-        self.pin_input = (By.ID, "access-code")
-        
-        # Locator for the "Sign In" button on the login page
-        self.logo = (By.XPATH, "//img[@id='form-logo-image']")
-        self.login_button = (By.XPATH, "//div//span[text()='Sign In']")
-        
-        # The logo locator is defined twice, which seems redundant. Remove one assignment.
-        self.logo = (By.XPATH, "//img[@id='form-logo-image']")
-        
-        # Locator for the "Home" link on the login page
-        self.home = (By.XPATH, "//a[@aria-label='Home']")
+    # Locator for the "Home" link on the login page
+    HOME = (By.XPATH, "//a[@aria-label='Home']")
 
     def get_home_icon_element(self):
         # Wait for and return the home icon element
-        return self.wait_for_element(*self.home)
+        return self.wait_for_element(*self.HOME)
 
     def get_logo_element(self):
         """Waits for and returns the logo element."""
         # Wait for and return the logo element
-        return self.wait_for_element(*self.logo)
+        return self.wait_for_element(*self.LOGO)
+
+    def wait_until_loaded(self):
+        """
+        Waits for the logo, PIN input and "Sign In" button together, using one round trip per check.
+        """
+        self.wait_for_elements([self.LOGO, self.PIN_INPUT, self.LOGIN_BUTTON])
 
     def login(self, pin):
         """
@@ -52,7 +36,7 @@ class LoginPage(BasePage):
         :param pin: The PIN to be entered into the PIN input field.
         """
         # Use the inherited send_keys method from BasePage to type the provided PIN into the PIN input field
-        self.send_keys(*self.pin_input, pin)
+        self.send_keys(*self.PIN_INPUT, pin)
         
         # Use the inherited click method from BasePage to click the "Sign In" button to complete login
-        self.click(*self.login_button)
+        self.click(*self.LOGIN_BUTTON)
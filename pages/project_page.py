@@ -5,31 +5,24 @@ This page handles actions related to navigating through projects, such as openin
 
 from selenium.webdriver.common.by import By
 from pages.base_page import BasePage
+from pages.conditions import TabSelected
 
 class ProjectPage(BasePage):
-    def __init__(self, driver):
-        """
-        Initializes the ProjectPage object with WebDriver instance and locators for various elements.
-        
-        :param driver: Selenium WebDriver instance
-        """
-        super().__init__(driver)  # Initialize the parent class (BasePage)
-
-        # Locators for various elements on the project page
-        self.test_automation_title = (By.XPATH, "//div/h5[text()='Test automation project']")  # Locator for the "Test automation project" title
+    # Locators for various elements on the project page, shared by every ProjectPage
+    TEST_AUTOMATION_TITLE = (By.XPATH, "//div/h5[text()='Test automation project']")  # Locator for the "Test automation project" title
 
-        self.details_tab = (By.ID, "detailsSection")  # Locator for the "Details" tab
-        self.videos_tab = (By.ID, "videosSection")  # Locator for the "Videos" tab
-        self.project_page = (By.XPATH, "//img[@alt='Test automation project']")
+    DETAILS_TAB = (By.ID, "detailsSection")  # Locator for the "Details" tab
+    VIDEOS_TAB = (By.ID, "videosSection")  # Locator for the "Videos" tab
+    PROJECT_PAGE = (By.XPATH, "//img[@alt='Test automation project']")
 
     def get_details_tab(self):
-        return self.wait_for_element(*self.details_tab)
+        return self.wait_for_element(*self.DETAILS_TAB)
     
     def get_videos_tab(self):
-        return self.wait_for_element(*self.videos_tab)
+        return self.wait_for_element(*self.VIDEOS_TAB)
 
     def get_project_page(self):
-        return self.wait_for_element(*self.project_page)
+        return self.wait_for_element(*self.PROJECT_PAGE)
     
     def open_test_automation_project(self):
         """
@@ -39,13 +32,14 @@ class ProjectPage(BasePage):
         self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
         
         # Find the 'Test automation project' title element on the page
-        self.element = self.find_element(*self.test_automation_title)
+        self.element = self.find_element(*self.TEST_AUTOMATION_TITLE)
         
         # Scroll the element into view
         self.driver.execute_script("arguments[0].scrollIntoView(true);", self.element)
         
         # Click on the 'Test automation project' title to open the project page
-        self.click(*self.test_automation_title)
+        self.click(*self.TEST_AUTOMATION_TITLE)
+        self.invalidate_cache()  # Opening the project loads another page
 
     def switch_to_details_tab(self):
         """
@@ -55,7 +49,7 @@ class ProjectPage(BasePage):
         self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
         
         # Click on the 'Details' tab to switch to it
-        self.click(*self.details_tab)
+        self.click(*self.DETAILS_TAB)
 
     def switch_to_videos_tab(self):
         """
@@ -65,4 +59,11 @@ class ProjectPage(BasePage):
         self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
         
         # Click on the 'Videos' tab to switch to it
-        self.click(*self.videos_tab)
+        self.click(*self.VIDEOS_TAB)
+
+    def wait_for_details_loaded(self):
+        """
+        Wait until the application shows the 'Details' tab as selected (the tab switch is client-side,
+        so the document itself does not change).
+        """
+        self.wait_until(TabSelected(*self.DETAILS_TAB))
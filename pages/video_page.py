@@ -2,55 +2,150 @@ from selenium.webdriver.common.by import By
 from pages.base_page import BasePage
 from selenium.webdriver.common.action_chains import ActionChains
 from selenium.webdriver.common.keys import Keys
-from pages.project_page import ProjectPage
+import config
+from pages.conditions import VideoPlaying, VideoTimeAdvanced, VideoPaused, VideoVolumeEquals, ActiveQualityEquals, QualityRendered
+from selenium.common.exceptions import TimeoutException
+from support.qoe import summarize
+from support.failure_artifacts import get_artifacts
 import time
 
+# JW Player API scripts, run inside the video iframe. Each one is a single execute_script call.
+PLAYER_STATE_JS = """
+var player = jwplayer();
+var level = (player.getQualityLevels() || [])[player.getCurrentQuality()];
+return {state: player.getState(), position: player.getPosition(), volume: player.getVolume(),
+        muted: player.getMute(), quality: level ? level.label : null};
+"""
+PLAYER_PLAY_JS = "jwplayer().play();"
+PLAYER_PAUSE_JS = "jwplayer().pause();"
+PLAYER_SET_VOLUME_JS = "jwplayer().setMute(false); jwplayer().setVolume(arguments[0]);"
+# Selects the quality level with the given label; returns false if the player has no such level
+PLAYER_SET_QUALITY_JS = """
+var player = jwplayer(), levels = player.getQualityLevels() || [];
+for (var i = 0; i < levels.length; i++) {
+    if (levels[i].label === arguments[0]) { player.setCurrentQuality(i); return true; }
+}
+return false;
+"""
+
+# Quality-of-experience collector, installed in the video iframe by every QOE_* script (only once per
+# document; nothing is installed until the player has rendered its <video> element). It listens to the
+# media events and JW Player's visualQuality event, so what happens between two samples is not missed.
+# Timestamps are Date.now() milliseconds.
+QOE_COLLECTOR_JS = """
+if (!window.__qoe) {
+    var video = document.querySelector('video.jw-video') || document.querySelector('video');
+    if (video) {
+        var qoe = window.__qoe = {video: video, firstFrameAt: null, startedBeforeInstall: video.currentTime > 0,
+                                  rebuffers: 0, rebufferMs: 0, bufferingSince: null, switches: [], pendingSwitch: null};
+        var firstFrame = function () { if (qoe.firstFrameAt === null) { qoe.firstFrameAt = Date.now(); } };
+        if (video.requestVideoFrameCallback) { video.requestVideoFrameCallback(firstFrame); }
+        video.addEventListener('playing', function () {
+            if (!video.requestVideoFrameCallback) { firstFrame(); }
+            if (qoe.bufferingSince !== null) { qoe.rebufferMs += Date.now() - qoe.bufferingSince; qoe.bufferingSince = null; }
+        });
+        video.addEventListener('waiting', function () {
+            // Only stalls after playback started count as rebuffering (not the startup, not seeks)
+            var started = qoe.firstFrameAt !== null || qoe.startedBeforeInstall;
+            if (started && !video.seeking && qoe.bufferingSince === null) { qoe.rebuffers++; qoe.bufferingSince = Date.now(); }
+        });
+        try {
+            jwplayer().on('visualQuality', function (event) {
+                var level = event.level || {}, pending = qoe.pendingSwitch, now = Date.now();
+                var requested = pending && pending.label === level.label;
+                qoe.switches.push({label: level.label || null, bitrate: level.bitrate || null, reason: event.reason || null,
+                                   at: now, switchMs: requested ? now - pending.at : null});
+                if (requested) { qoe.pendingSwitch = null; }
+            });
+        } catch (e) {}  // No JW Player API: switches are not reported
+    }
+}
+var qoe = window.__qoe;
+"""
+# Records that a quality switch to arguments[0] was requested; the next visualQuality event for it gives the time-to-switch
+QOE_MARK_SWITCH_JS = QOE_COLLECTOR_JS + "if (qoe) { qoe.pendingSwitch = {label: arguments[0], at: Date.now()}; } return !!qoe;"
+# Reads everything the collector has seen plus the video's frame counters, in one call
+QOE_SAMPLE_JS = QOE_COLLECTOR_JS + """
+if (!qoe) { return null; }
+var video = qoe.video, now = Date.now();
+var quality = video.getVideoPlaybackQuality ? video.getVideoPlaybackQuality() : null;
+return {now: now, firstFrameAt: qoe.firstFrameAt, startedBeforeInstall: qoe.startedBeforeInstall,
+        rebuffers: qoe.rebuffers, rebufferMs: qoe.rebufferMs + (qoe.bufferingSince !== null ? now - qoe.bufferingSince : 0),
+        droppedFrames: quality ? quality.droppedVideoFrames : null, decodedFrames: quality ? quality.totalVideoFrames : null,
+        switches: qoe.switches, position: video.currentTime};
+"""
+
+
 class VideoPage(BasePage):
-    def __init__(self, driver):
+    # Locators for various video controls and elements on the page, shared by every VideoPage
+    ALL_TITLES = (By.XPATH,"//p[text()=' All Titles ']")
+    PLAY_BUTTON = (By.XPATH, "//button[@aria-label='Play Video']")  # Locator for play button
+    VIDEO_ELEMENT = (By.XPATH, "//video[@class='jw-video jw-reset']")  # Locator for video element
+    PROJECT_PAGE = (By.XPATH, "//img[@alt='Test automation project']")
+    CONTINUE_WATCHING_BUTTON = (By.XPATH, "//button[@aria-label='Continue Watching']")  # Locator for 'Continue Watching' button
+    VOLUME_SLIDER = (By.XPATH, "//div[@aria-label='Mute button'] | //div[@aria-label='Unmute button']")  # Locator for volume control (mute/unmute)
+    SETTINGS_MENU = (By.XPATH, "//div[@aria-label='Settings']")  # Locator for settings menu
+    RESOLUTION_480P = (By.XPATH, "//button[@class='jw-reset-text jw-settings-content-item' and text()='480p']")  # Locator for 480p resolution option
+    RESOLUTION_720P = (By.XPATH, "//button[@class='jw-reset-text jw-settings-content-item' and text()='720p']")  # Locator for 720p resolution option
+    PAUSE_BUTTON = (By.XPATH, "//div[@class='jw-icon jw-icon-inline jw-button-color jw-reset jw-icon-playback' and @aria-label='Play'] | //div[@class='jw-icon jw-icon-inline jw-button-color jw-reset jw-icon-playback' and @aria-label='Pause']")  # Locator for play/pause button
+    BACK_BUTTON = (By.XPATH, "//div/button[@aria-label='Go Back and continue playing video']")  # Locator for back button
+    LOGOUT_BUTTON = (By.ID, "signOutSideBar")  # Locator for logout button
+    VIDEO_IFRAME = (By.ID, "video_player")  # Locator for the iframe containing the video player
+
+    def __init__(self, driver, control_mode=None, qoe_mode=None):
         """
-        Initializes the VideoPage object with WebDriver instance and locators for various elements.
+        Initializes the VideoPage object with WebDriver instance and the way it operates the player.
         
         :param driver: Selenium WebDriver instance
+        :param control_mode: 'ui' to operate the player through its controls, 'api' to call the JW Player
+                             JavaScript API directly (defaults to config.PLAYER_CONTROL)
+        :param qoe_mode: 'fail', 'warn' or 'off' (defaults to config.QOE_MODE); with 'off' the QoE collector
+                         is not installed and quality switches are not timed
         """
         super().__init__(driver)  # Initialize the parent class (BasePage)
-        
-        # Locators for various video controls and elements on the page
-        self.all_titles = (By.XPATH,"//p[text()=' All Titles ']")
-        self.play_button = (By.XPATH, "//button[@aria-label='Play Video']")  # Locator for play button
-        self.video_element = (By.XPATH, "//video[@class='jw-video jw-reset']")  # Locator for video element
-        self.project_page = (By.XPATH, "//img[@alt='Test automation project']")
-        self.continue_watching_button = (By.XPATH, "//button[@aria-label='Continue Watching']")  # Locator for 'Continue Watching' button
-        self.volume_slider = (By.XPATH, "//div[@aria-label='Mute button'] | //div[@aria-label='Unmute button']")  # Locator for volume control (mute/unmute)
-        self.settings_menu = (By.XPATH, "//div[@aria-label='Settings']")  # Locator for settings menu
-        self.resolution_480p = (By.XPATH, "//button[@class='jw-reset-text jw-settings-content-item' and text()='480p']")  # Locator for 480p resolution option
-        self.resolution_720p = (By.XPATH, "//button[@class='jw-reset-text jw-settings-content-item' and text()='720p']")  # Locator for 720p resolution option
-        self.pause_button = (By.XPATH, "//div[@class='jw-icon jw-icon-inline jw-button-color jw-reset jw-icon-playback' and @aria-label='Play'] | //div[@class='jw-icon jw-icon-inline jw-button-color jw-reset jw-icon-playback' and @aria-label='Pause']")  # Locator for play/pause button
-        self.back_button = (By.XPATH, "//div/button[@aria-label='Go Back and continue playing video']")  # Locator for back button
-        self.logout_button = (By.ID, "signOutSideBar")  # Locator for logout button
+        self.control_mode = control_mode or config.PLAYER_CONTROL
+        self.collect_qoe = (qoe_mode or config.QOE_MODE) != "off"
+        self.play_requested_at = None  # When play_video clicked Play (epoch seconds), for the startup time
+        self.startup_seconds = None  # Click-to-playing time as measured by the wait, used when the collector missed the first frame
 
     def get_logout_button(self):
         """
         Waits for the logout button to be visible on the page.
         """
-        self.wait_for_element(*self.logout_button)  # Wait for the logout button element to be visible
+        self.wait_for_element(*self.LOGOUT_BUTTON)  # Wait for the logout button element to be visible
 
     def play_video(self):
         """
         Click the play button to start video playback if the play button is visible.
         """
-        self.wait_for_element(*self.play_button)  # Wait until play button is visible
-        self.click(*self.play_button)  # Click the play button to start the video
-        time.sleep(2)  # Sleep for 2 seconds after clicking the play button
+        self.wait_for_element(*self.PLAY_BUTTON)  # Wait until play button is visible
+        self.play_requested_at = time.time()
+        self.click(*self.PLAY_BUTTON)  # Click the play button to start the video
+
+        # Wait for the player to actually start instead of sleeping; the video element lives in the iframe
+        with self.player_frame():
+            # Every check also installs the QoE collector, so it is listening before the first frame
+            self.wait_until(VideoPlaying(prelude=QOE_COLLECTOR_JS if self.collect_qoe else ""))
+        self.startup_seconds = time.time() - self.play_requested_at
+
+    def wait_for_playback_to_advance(self, seconds):
+        """
+        Wait until the video has really played for the given number of seconds.
+
+        :param seconds: Seconds of playback (video currentTime) to wait for
+        """
+        with self.player_frame():  # The video element lives inside the player iframe
+            self.wait_until(VideoTimeAdvanced(seconds), timeout=seconds + config.TIMEOUT)
     
     def navigate_to_all_titles(self):
         """
         Scrolls the 'All Titles' element into view.
         """
-        # Wait for the 'All Titles' element to be present
-        self.wait_for_element(*self.all_titles)
+        # Wait for the 'All Titles' element to be present; the wait returns the element it checked
+        all_titles = self.wait_for_element(*self.ALL_TITLES)
         
         # Scroll the 'All Titles' element into view
-        self.driver.execute_script("arguments[0].scrollIntoView();", self.find_element(*self.all_titles))
+        self.driver.execute_script("arguments[0].scrollIntoView();", all_titles)
         
         # Optionally, you can log or print that the element is now in view.
         print("'All Titles' element has been scrolled into view.")
@@ -58,23 +153,31 @@ class VideoPage(BasePage):
     def switch_to_video_iframe(self):
         """
         Switch to the video iframe if the video player is inside an iframe.
-        Handles iframe switching for video controls interaction.
+        Handles iframe switching for video controls interaction; does nothing if already inside it.
         """
         try:
-            # Wait for the iframe to be present in the DOM and switch to it
-            self.wait_for_element(By.ID, "video_player")  # Wait for iframe to be present
-            iframe = self.find_element(By.ID, "video_player")  # Find the iframe element
-            self.driver.switch_to.frame(iframe)  # Switch to the iframe containing the video player
-            print("Switched to video iframe successfully.")
+            # Wait for the iframe to be available and switch to it (skipped when already inside)
+            self.switch_to_frame(*self.VIDEO_IFRAME)
         except Exception as e:
             print(f"Error switching to iframe: {e}")  # Log error if iframe switch fails
+            get_artifacts().capture(self.driver, "VideoPage.switch_to_video_iframe", error=e)  # Keep the state it failed in
+
+    def player_frame(self):
+        """
+        Context manager running the enclosed block inside the video iframe and returning to
+        the previous frame context afterwards, e.g. `with video_page.player_frame(): ...`.
+        """
+        return self.in_frame(*self.VIDEO_IFRAME)
 
-    def hover_over_video(self):
+    def hover_over_video(self, video_player_container=None):
         """
         Hover over the video player to make video controls visible (like play/pause buttons, volume slider).
+
+        :param video_player_container: The 'media-player' element if the caller already has it
         """
         # Wait for video player container to be present before hovering
-        video_player_container = self.wait_for_element(By.ID, "media-player")
+        if video_player_container is None:
+            video_player_container = self.wait_for_element(By.ID, "media-player")
         
         # Create ActionChains object to simulate mouse movements and hover over the video player
         actions = ActionChains(self.driver)
@@ -82,48 +185,80 @@ class VideoPage(BasePage):
         # Hover over the video player container to trigger floating buttons and controls
         actions.move_to_element(video_player_container).perform()
 
+    def get_player_state(self):
+        """
+        Reads the JW Player state in one call.
+
+        :return: Dict with 'state' (e.g. 'playing', 'paused'), 'position' (seconds), 'volume' (0-100),
+                 'muted' and 'quality' (label of the current quality level, e.g. '480p')
+        """
+        with self.player_frame():
+            return self.driver.execute_script(PLAYER_STATE_JS)
+
     def pause_video(self):
         """
         Click the pause button to pause the video playback.
         """
         self.switch_to_video_iframe()  # Switch to the video iframe if not already inside
-        self.hover_over_video()  # Hover over the video to reveal controls
-        self.click(*self.pause_button)  # Click the play/pause button to toggle video pause/play
+        if self.control_mode == "api":
+            self.driver.execute_script(PLAYER_PAUSE_JS)  # Pause through the JW Player API
+        else:
+            self.hover_over_video()  # Hover over the video to reveal controls
+            self.click(*self.PAUSE_BUTTON)  # Click the play/pause button to toggle video pause/play
+        self.wait_until(VideoPaused())  # Wait until the video element reports it is paused
 
     def continue_watching(self):
         """
         Click the 'Continue Watching' button to continue playback after a break.
         """
-        self.driver.switch_to.parent_frame()  # Switch back to the parent frame if inside an iframe
-        self.click(*self.continue_watching_button)  # Click the continue watching button
+        if self.control_mode == "api":
+            self.switch_to_video_iframe()
+            self.driver.execute_script(PLAYER_PLAY_JS)  # Resume through the JW Player API
+            self.wait_until(VideoPlaying())
+            return
+        self.switch_to_default_content()  # Switch back to the main document if inside the iframe
+        self.click(*self.CONTINUE_WATCHING_BUTTON)  # Click the continue watching button
+        with self.player_frame():  # Wait for playback to resume, like the API branch; the video lives in the iframe
+            self.wait_until(VideoPlaying())
 
     def adjust_volume(self):
         """
-        Adjust the video volume to a desired level.
-        This can simulate key presses to change the volume.
+        Adjust the video volume to 50%, unmuted.
+        In 'ui' mode it presses the arrow keys as many times as the current volume requires.
         """
         self.switch_to_video_iframe()  # Switch to the video iframe
-        self.hover_over_video()  # Hover over the video player to make controls visible
+        if self.control_mode == "api":
+            self.driver.execute_script(PLAYER_SET_VOLUME_JS, 50)  # Set the volume through the JW Player API
+            self.wait_until(VideoVolumeEquals(0.5))
+            return
 
-        video_player_container = self.wait_for_element(By.ID, "media-player")  # Wait for video player container to be visible
+        # Resolve the video player container once and reuse it for every hover and key press
+        video_player_container = self.wait_for_element(By.ID, "media-player")
+        self.hover_over_video(video_player_container)  # Hover over the video player to make controls visible
 
-        # Use ActionChains to hover over the volume slider element
-        action = ActionChains(self.driver)
-        action.move_to_element(video_player_container).perform()  # Hover to the volume slider area
+        # Start from the player's actual state: it remembers the volume and mute of earlier sessions
+        state = self.driver.execute_script(PLAYER_STATE_JS)
+        if state["muted"]:
+            self.click(*self.VOLUME_SLIDER)  # Unmute first, the arrow keys only change the level
+            state = self.driver.execute_script(PLAYER_STATE_JS)
+        volume = int(round(state["volume"]))
 
-        # Adjust the volume by simulating the UP key press 10 times (to increase volume)
-        for _ in range(10):
-            self.hover_over_video()  # Ensure hovering over video player
-            video_player_container.send_keys(Keys.UP)  # Simulate pressing UP arrow key
-            action.move_to_element(video_player_container).perform()
-            time.sleep(0.2)  # Sleep for a short duration to simulate key press intervals
+        # Each arrow key moves the volume by 10%, clamped to 0-100%
+        if volume % 10 == 0:
+            ups, downs = max(0, (50 - volume) // 10), max(0, (volume - 50) // 10)
+        else:
+            # Off the 10% steps: go up to 100% (the clamp makes that exact), then down to 50%
+            ups, downs = -(-(100 - volume) // 10), 5
 
-        # Adjust the volume by simulating the DOWN key press 5 times (to decrease volume)
-        for _ in range(5):
-            self.hover_over_video()  # Ensure hovering over video player
+        for _ in range(ups):
+            self.hover_over_video(video_player_container)  # Ensure hovering over video player
+            video_player_container.send_keys(Keys.UP)  # Simulate pressing UP arrow key
+        for _ in range(downs):
+            self.hover_over_video(video_player_container)  # Ensure hovering over video player
             video_player_container.send_keys(Keys.DOWN)  # Simulate pressing DOWN arrow key
-            time.sleep(0.2)
 
+        # Wait for the player to apply the key presses instead of sleeping between them
+        self.wait_until(VideoVolumeEquals(0.5))
         print("Volume set to 50%")  # Print the final volume level (50%)
 
     def change_resolution(self, resolution):
@@ -133,44 +268,77 @@ class VideoPage(BasePage):
         :param resolution: Resolution to change to ('480p' or '720p')
         """
         self.switch_to_video_iframe()  # Switch to the iframe containing the video player
+        if self.collect_qoe:
+            self.driver.execute_script(QOE_MARK_SWITCH_JS, resolution)  # Start the time-to-switch clock
+        if self.control_mode == "api":
+            # Select the quality level through the JW Player API
+            if not self.driver.execute_script(PLAYER_SET_QUALITY_JS, resolution):
+                raise ValueError(f"The player has no '{resolution}' quality level.")
+            self.wait_until(ActiveQualityEquals(resolution))
+            return
+
         self.hover_over_video()  # Hover over the video player to activate controls
-        self.click(*self.settings_menu)  # Click on the settings menu to open resolution options
+        self.click(*self.SETTINGS_MENU)  # Click on the settings menu to open resolution options
         
         # Change resolution based on the argument passed (either 480p or 720p)
         if resolution == '480p':
-            self.click(*self.resolution_480p)  # Click the 480p button to change resolution
+            self.click(*self.RESOLUTION_480P)  # Click the 480p button to change resolution
         elif resolution == '720p':
-            self.click(*self.resolution_720p)  # Click the 720p button to change resolution
+            self.click(*self.RESOLUTION_720P)  # Click the 720p button to change resolution
+
+        # Wait until the player has switched to the requested quality level
+        self.wait_until(ActiveQualityEquals(resolution))
+
+    def wait_for_quality_rendered(self, resolution, timeout=None):
+        """
+        Waits until the player renders the requested quality (JW Player's visualQuality event), which is
+        later than change_resolution returning: the new level has to be downloaded first.
+
+        :param resolution: Quality label requested with change_resolution (e.g. '480p')
+        :param timeout: Seconds to wait (defaults to the 'switch_ms' QoE threshold)
+        :return: True if the switch was rendered in time, False otherwise (the QoE check reports it).
+        """
+        if timeout is None:
+            timeout = config.QOE_THRESHOLDS["switch_ms"] / 1000
+        try:
+            with self.player_frame():
+                self.wait_until(QualityRendered(resolution), timeout=timeout)
+            return True
+        except TimeoutException:
+            return False
+
+    def get_qoe_metrics(self):
+        """
+        Samples the QoE collector in one call and summarizes it (see support/qoe.py for the metrics).
+
+        :return: Dict of metrics; empty if the player has not rendered its video element.
+        """
+        with self.player_frame():
+            sample = self.driver.execute_script(QOE_SAMPLE_JS)
+        return summarize(sample, self.play_requested_at, self.startup_seconds)
 
     def navigate_back(self):
         """
         Click the back button to return to the previous page or video.
         """
-        self.driver.switch_to.parent_frame()  # Switch back to the parent frame if inside an iframe
-        self.click(*self.back_button)  # Click the back button to navigate backward
+        self.switch_to_default_content()  # Switch back to the main document if inside the iframe
+        self.click(*self.BACK_BUTTON)  # Click the back button to navigate backward
+        self.invalidate_cache()  # Going back loads another page
 
     def logout(self):
         """
         Click the logout button to log out from the application.
         """
-        
-        self.wait_for_element(*self.project_page)
+        # Switch to the main document if still inside the iframe (the tracked frame context makes this free otherwise)
+        self.switch_to_default_content()
+        self.wait_for_element(*self.PROJECT_PAGE)
         try:
-            # Check if the browser is inside an iframe and handle it accordingly
-            is_in_iframe = self.driver.execute_script("return window.self !== window.top;")
-            if is_in_iframe:
-                print("Currently inside an iframe.")
-                self.driver.switch_to.default_content()  # Switch to main document if in iframe
-            else:
-                print("Not inside an iframe.")
-
-            # Wait for the logout button to be clickable
-            self.wait_for_element(*self.logout_button)
-
-            # Click on the logout button to log out from the application
-            self.click(*self.logout_button)
+            # Click on the logout button (click waits for it to be clickable) to log out from the application
+            self.click(*self.LOGOUT_BUTTON)
             print("Logout button clicked successfully.")
 
-            time.sleep(3)  # Wait for a few seconds to ensure the logout process completes
+            # Wait for the sign-in form to be attached, which means the logout has completed
+            self.wait_for_presence(By.ID, "sign-in-form")
         except Exception as e:
             print(f"Error during logout: {e}")  # Print error if something goes wrong
+            get_artifacts().capture(self.driver, "VideoPage.logout", error=e)  # Keep the state it failed in
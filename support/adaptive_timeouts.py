@@ -0,0 +1,84 @@
+'''
+adaptive_timeouts.py (Per-wait timeouts learned from past runs)
+Keeps the time each wait took to succeed in a local stats file, and derives a timeout per wait
+from that history: p99 * safety factor, clamped between a floor and a cap. A broken locator then
+fails after a few seconds instead of the full default timeout.
+
+Waits are keyed by their description (e.g. "element ('id', 'videosSection') to be clickable").
+Known-slow waits can be given a fixed timeout in config.TIMEOUT_OVERRIDES, and any wait given an
+explicit timeout by its caller keeps it.
+'''
+
+import math
+import threading
+
+from support.json_store import locked, read_json, write_json
+
+
+class LatencyStats:
+    def __init__(self, path, apply=True, safety_factor=3.0, floor=2.0, cap=15.0, min_samples=5, max_samples=200):
+        """
+        :param path: JSON file the samples are loaded from and saved to.
+        :param apply: Use the derived timeouts; with False, samples are only collected.
+        :param safety_factor: Multiplier applied to the p99 of the samples.
+        :param floor: Smallest derived timeout, in seconds.
+        :param cap: Largest derived timeout, in seconds.
+        :param min_samples: Samples needed before a wait gets a derived timeout.
+        :param max_samples: Most recent samples kept per wait.
+        """
+        self.path = path
+        self.apply = apply
+        self.safety_factor = safety_factor
+        self.floor = floor
+        self.cap = cap
+        self.min_samples = min_samples
+        self.max_samples = max_samples
+        self.new_samples = {}  # Samples of this run, merged into the file on save
+        self.lock = threading.Lock()
+        self.samples = read_json(path, {})  # A missing or damaged file starts an empty history
+
+    def record(self, key, seconds):
+        """
+        Adds the time a wait took to succeed.
+        """
+        with self.lock:
+            self.samples.setdefault(key, []).append(seconds)
+            self.new_samples.setdefault(key, []).append(seconds)
+
+    def timeout_for(self, key, default):
+        """
+        Returns the learned timeout of a wait, or `default` if it is not learned yet (or apply is off).
+        """
+        samples = self.samples.get(key, [])
+        if not self.apply or len(samples) < self.min_samples:
+            return default
+        ordered = sorted(samples[-self.max_samples:])
+        p99 = ordered[max(0, math.ceil(0.99 * len(ordered)) - 1)]
+        return min(self.cap, max(self.floor, p99 * self.safety_factor))
+
+    def save(self):
+        """
+        Merges this run's samples into the stats file. Parallel workers save at the same time, so the
+        file is re-read and replaced under a lock, keeping the samples the others saved in the meantime.
+        """
+        with locked(self.path):
+            merged = read_json(self.path, {})
+            for key, samples in self.new_samples.items():
+                merged[key] = (merged.get(key, []) + samples)[-self.max_samples:]
+            write_json(self.path, merged)
+        self.new_samples = {}
+
+
+_latency_stats = None
+
+
+def get_latency_stats():
+    """
+    Returns the stats of the current run, or None when waits use their default timeouts.
+    """
+    return _latency_stats
+
+
+def set_latency_stats(latency_stats):
+    global _latency_stats
+    _latency_stats = latency_stats
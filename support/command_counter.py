@@ -0,0 +1,141 @@
+'''
+command_counter.py (WebDriver command counting and budgets)
+Counts the WebDriver commands (HTTP round trips to chromedriver) a driver sends. Every command,
+including the ones sent through WebElement methods, goes through driver.execute, which is wrapped
+on the driver instance. Commands are attributed to the current behave step and to the outermost
+page-object method on the call stack (e.g. 'VideoPage.pause_video').
+
+Steps can declare how many commands they may use with the @command_budget decorator.
+The last config.ARTIFACT_COMMANDS commands are kept with their timings for the failure artifacts.
+'''
+
+import functools
+import sys
+import time
+import weakref
+from collections import Counter, deque
+
+import config
+from pages.base_page import BasePage
+
+counters = weakref.WeakKeyDictionary()  # The counter of each wrapped driver
+
+
+def counter_for(driver):
+    """
+    Returns the driver's counter, wrapping the driver on first use (pooled drivers are wrapped only once).
+    """
+    if driver not in counters:
+        counters[driver] = CommandCounter(driver)
+    return counters[driver]
+
+
+def page_object_method():
+    """
+    Name of the outermost page-object method on the current call stack, or None outside page objects.
+    """
+    name = None
+    frame = sys._getframe(2)  # Skip this function and counted_execute
+    while frame is not None:
+        instance = frame.f_locals.get("self")
+        if isinstance(instance, BasePage):
+            name = f"{type(instance).__name__}.{frame.f_code.co_name}"
+        frame = frame.f_back
+    return name
+
+
+class CommandCounter:
+    def __init__(self, driver):
+        """
+        Starts counting the commands sent by a driver.
+        """
+        self.total = 0
+        self.by_command = Counter()  # Counts per command name, e.g. 'findElement', 'executeScript'
+        self.by_step = Counter()  # Counts per step text, summed over every run of the step
+        self.step_runs = Counter()  # How many times each step ran
+        self.by_method = Counter()  # Counts per page-object method, e.g. 'VideoPage.pause_video'
+        # Last commands as (epoch time, command, params, duration in seconds, step, error type or None)
+        self.recent = deque(maxlen=config.ARTIFACT_COMMANDS)
+        self.step = None
+        execute = driver.execute
+
+        def counted_execute(driver_command, params=None):
+            self.total += 1
+            self.by_command[driver_command] += 1
+            if self.step is not None:
+                self.by_step[self.step] += 1
+                method = page_object_method()
+                if method is not None:
+                    self.by_method[method] += 1
+            at, started, error = time.time(), time.perf_counter(), None
+            try:
+                return execute(driver_command, params)
+            except Exception as command_error:
+                error = type(command_error).__name__
+                raise
+            finally:
+                self.recent.append((at, driver_command, params, time.perf_counter() - started, self.step, error))
+
+        driver.execute = counted_execute
+
+    def start_step(self, name):
+        """
+        Attributes the following commands to a step.
+        """
+        self.step = name
+        self.step_runs[name] += 1
+
+    def end_step(self):
+        self.step = None
+
+
+def merge(counters_list):
+    """
+    Sums the per-step and per-method counts of several counters.
+
+    :return: Tuple of (by_step, step_runs, by_method) Counters.
+    """
+    by_step, step_runs, by_method = Counter(), Counter(), Counter()
+    for counter in counters_list:
+        by_step.update(counter.by_step)
+        step_runs.update(counter.step_runs)
+        by_method.update(counter.by_method)
+    return by_step, step_runs, by_method
+
+
+def report(counters_list, top=10):
+    """
+    Returns a table of the steps and page-object methods sending the most commands.
+    """
+    by_step, step_runs, by_method = merge(counters_list)
+    lines = ["WebDriver commands per step (average per run):"]
+    lines.extend(f"  {by_step[name] / step_runs[name]:>8.1f}  {name}" for name, _ in by_step.most_common(top))
+    lines.append("WebDriver commands per page-object method (total):")
+    lines.extend(f"  {count:>8}  {name}" for name, count in by_method.most_common(top))
+    return "\n".join(lines)
+
+
+def command_budget(max_commands):
+    """
+    Declares the maximum number of WebDriver commands a step may send. Place it below the behave
+    decorator. What happens when the budget is exceeded depends on context.command_budget_mode:
+    'fail' fails the step, 'warn' prints a warning, 'off' skips the check.
+    """
+    def decorate(step_function):
+        @functools.wraps(step_function)
+        def step_with_budget(context, *args, **kwargs):
+            mode = getattr(context, "command_budget_mode", "off")
+            if mode == "off":
+                return step_function(context, *args, **kwargs)
+            counter = counter_for(context.driver)
+            before = counter.total
+            result = step_function(context, *args, **kwargs)
+            used = counter.total - before
+            if used > max_commands:
+                message = f"Step '{context.current_step_name}' used {used} WebDriver commands, its budget is {max_commands}"
+                if mode == "fail":
+                    raise AssertionError(message)
+                print(f"WARNING: {message}")
+            return result
+        return step_with_budget
+    return decorate
@@ -0,0 +1,143 @@
+'''
+driver_factory.py (WebDriver creation)
+Builds the Chrome WebDriver used by the scenarios, so that every place that needs a browser
+(the driver pool, parallel workers) creates it the same way. The browser is configured from
+one of the named profiles in config.BROWSER_PROFILES.
+Sessions are started by a local chromedriver, or with a remote URL on a Selenium Grid/standalone
+server or the local dispatcher of support/grid.py.
+'''
+
+import itertools
+import os
+import selenium
+from selenium import webdriver
+from selenium.webdriver.remote.command import Command
+import config
+from support.network import enable_performance_log, block_urls
+
+# Numbers the sessions of this process whose cache directory is derived without a name
+session_numbers = itertools.count()
+
+
+def build_options(profile, profile_dir=None, download_dir=None, network=False, disk_cache_dir=None):
+    """
+    Translates a browser profile into Chrome options.
+
+    :param profile: Dict of profile settings (see config.BROWSER_PROFILES).
+    :param profile_dir: Chrome user data directory; give each concurrent session its own so they stay isolated.
+    :param download_dir: Directory Chrome saves downloads to.
+    :param network: Record DevTools network events in the performance log.
+    :param disk_cache_dir: HTTP cache directory of this session (see create_driver for the profile's).
+    :return: The ChromeOptions for the session.
+    """
+    options = webdriver.ChromeOptions()
+    prefs = {}
+
+    if profile.get("headless"):
+        options.add_argument("--headless=new")
+    if profile.get("window_size"):
+        width, height = profile["window_size"]
+        options.add_argument(f"--window-size={width},{height}")
+    if profile.get("disable_extensions"):
+        options.add_argument("--disable-extensions")
+    if profile.get("disable_gpu"):
+        options.add_argument("--disable-gpu")
+    if profile.get("block_images"):
+        prefs["profile.managed_default_content_settings.images"] = 2  # 2 = block
+    if disk_cache_dir:
+        options.add_argument(f"--disk-cache-dir={os.path.abspath(disk_cache_dir)}")
+    # Console messages, read by the failure artifacts (support/failure_artifacts.py)
+    options.set_capability("goog:loggingPrefs", {"browser": "ALL"})
+    if network:
+        enable_performance_log(options)
+
+    if profile_dir:
+        os.makedirs(profile_dir, exist_ok=True)
+        options.add_argument(f"--user-data-dir={os.path.abspath(profile_dir)}")
+
+    if download_dir:
+        os.makedirs(download_dir, exist_ok=True)
+        prefs.update({
+            "download.default_directory": os.path.abspath(download_dir),
+            "download.prompt_for_download": False,
+        })
+
+    if prefs:
+        options.add_experimental_option("prefs", prefs)
+    return options
+
+
+def check_remote_support():
+    """
+    Fails fast if the installed Selenium cannot start remote sessions (grid mode), instead of the
+    first session failing mid-run with an ImportError.
+    """
+    version = tuple(int(part) for part in selenium.__version__.split(".")[:2] if part.isdigit())
+    if version < (4, 26):
+        raise RuntimeError(f"Grid mode needs Selenium 4.26+ (installed: {selenium.__version__}); "
+                           f"run 'pip install \"selenium>=4.26\"' or run without grid mode.")
+
+
+class RemoteChrome(webdriver.Remote):
+    """
+    A Chrome session on a remote WebDriver server, with the Chrome-only commands the suite uses
+    (DevTools commands, browser logs) like a local webdriver.Chrome. Needs Selenium 4.26+ (ClientConfig).
+    """
+
+    def __init__(self, url, options):
+        # Imported here so that older Selenium versions can still run the suite without grid mode
+        from selenium.webdriver.chromium.remote_connection import ChromiumRemoteConnection
+        from selenium.webdriver.remote.client_config import ClientConfig
+
+        # Creating a session may wait in the server's queue for a free slot
+        client_config = ClientConfig(remote_server_addr=url, timeout=config.GRID_QUEUE_TIMEOUT + 60)
+        executor = ChromiumRemoteConnection(url, "goog", "chrome", client_config=client_config)
+        super().__init__(command_executor=executor, options=options)
+
+    def get_log(self, log_type):
+        return self.execute(Command.GET_LOG, {"type": log_type})["value"]
+
+
+def create_driver(profile_name=None, profile_dir=None, download_dir=None, network=False, disk_cache_dir=None,
+                  remote_url=None, cache_name=None):
+    """
+    Starts a new Chrome session.
+
+    :param profile_name: Name of a profile in config.BROWSER_PROFILES (defaults to config.BROWSER_PROFILE).
+    :param profile_dir: Chrome user data directory; give each concurrent session its own so they stay isolated.
+    :param download_dir: Directory Chrome saves downloads to.
+    :param network: Block config.NETWORK_BLOCKED_URLS and record network events (see support/network.py).
+    :param disk_cache_dir: HTTP cache directory, overriding the profile's.
+    :param remote_url: URL of a Selenium Grid/standalone server to start the session on (local chromedriver when None).
+    :param cache_name: Sub-directory of the profile's disk_cache_dir used by this session; concurrent sessions need
+                       different names, and reusing a name reuses its cache. A new name per session when None.
+    :return: The new Chrome WebDriver instance.
+    """
+    profile_name = profile_name or config.BROWSER_PROFILE
+    profile = config.BROWSER_PROFILES[profile_name]
+    if disk_cache_dir is None and profile.get("disk_cache_dir"):
+        # Chrome sessions cannot share a cache directory: each one gets a sub-directory of the profile's
+        cache_name = cache_name or f"{profile_name}-{os.getpid()}-{next(session_numbers)}"
+        disk_cache_dir = os.path.join(profile["disk_cache_dir"], cache_name)
+    options = build_options(profile, profile_dir, download_dir, network=network, disk_cache_dir=disk_cache_dir)
+    if remote_url:
+        driver = RemoteChrome(remote_url, options)
+    else:
+        driver = webdriver.Chrome(options=options)  # Ensure chromedriver is set in PATH
+
+    if network and config.NETWORK_BLOCKED_URLS:
+        block_urls(driver, config.NETWORK_BLOCKED_URLS)
+
+    if profile.get("maximize"):
+        driver.maximize_window()  # Maximize the browser window for a consistent testing environment
+    if profile.get("media_bandwidth_kbps"):
+        # Throttle downloads so that adaptive streaming settles on a low bitrate
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.emulateNetworkConditions", {
+            "offline": False,
+            "latency": 0,
+            "downloadThroughput": profile["media_bandwidth_kbps"] * 1024 / 8,  # Bytes per second
+            "uploadThroughput": -1,  # -1 = no throttling
+        })
+    driver.execute_cdp_cmd("Performance.enable", {})  # Needed for the per-session resource metrics
+    return driver
@@ -0,0 +1,134 @@
+'''
+driver_pool.py (Warm browser pool)
+Keeps Chrome sessions alive between scenarios. Sessions are launched ahead of time, handed out
+to scenarios, reset when they come back and recycled after a number of uses or after a crash.
+A recycled session is replaced when a scenario next needs one, so no browser is started after
+the last scenario and a failing launch fails the scenario that needed it.
+'''
+
+import time
+from selenium.common.exceptions import WebDriverException
+from pages.base_page import reset_frame_context
+
+
+class DriverPool:
+    def __init__(self, factory, size=1, max_uses=20):
+        """
+        :param factory: Callable taking a launch number and a slot number, and returning a new WebDriver.
+                        Slots are the numbers of the sessions alive at the same time: a replacement (after
+                        max_uses or a crash) gets the slot of the session it replaces, so per-slot resources
+                        such as a persistent cache directory survive recycling and stay bounded.
+        :param size: Number of sessions to keep warm.
+        :param max_uses: Number of scenarios a session serves before it is replaced by a fresh one.
+        """
+        self.factory = factory
+        self.size = size
+        self.max_uses = max_uses
+        self.idle = []  # Warm sessions waiting for a scenario
+        self.uses = {}  # Number of scenarios served, keyed by id(driver)
+        self.slots = {}  # Slot number of each live session, keyed by id(driver)
+
+        # Metrics reported at the end of the run
+        self.hits = 0
+        self.misses = 0
+        self.recycled = 0
+        self.crashed = 0
+        self.launch_times = []
+
+    def launch(self):
+        """
+        Starts a new session and records how long it took.
+        """
+        slot = min(set(range(len(self.slots) + 1)) - set(self.slots.values()))  # Lowest slot not in use
+        started = time.perf_counter()
+        driver = self.factory(len(self.launch_times), slot)
+        self.launch_times.append(time.perf_counter() - started)
+        self.uses[id(driver)] = 0
+        self.slots[id(driver)] = slot
+        return driver
+
+    def prelaunch(self):
+        """
+        Launches sessions until `size` of them are waiting idle.
+        """
+        while len(self.idle) < self.size:
+            self.idle.append(self.launch())
+
+    def acquire(self):
+        """
+        Hands out a warm session (a hit) or launches one if none is idle (a miss).
+        """
+        if self.idle:
+            self.hits += 1
+            driver = self.idle.pop()
+        else:
+            self.misses += 1
+            driver = self.launch()
+        self.uses[id(driver)] += 1
+        return driver
+
+    def release(self, driver):
+        """
+        Takes a session back after a scenario. It is reset and kept warm, or quit and replaced
+        when it reached max_uses or could not be reset (crashed browser or driver); the replacement
+        is launched by the next acquire.
+        """
+        if self.uses[id(driver)] >= self.max_uses:
+            self.recycled += 1
+            self.discard(driver)
+        else:
+            try:
+                self.reset(driver)
+                self.idle.append(driver)
+            except Exception:  # WebDriverException, or a connection error (urllib3) when chromedriver itself died
+                self.crashed += 1
+                self.discard(driver)
+
+    @staticmethod
+    def reset(driver):
+        """
+        Brings a session back to a blank state: one window, top-level frame, no cookies or storage, about:blank.
+        """
+        handles = driver.window_handles
+        for handle in handles[1:]:  # Close any window the scenario opened
+            driver.switch_to.window(handle)
+            driver.close()
+        driver.switch_to.window(handles[0])
+        driver.switch_to.default_content()
+        reset_frame_context(driver)  # Keep the page objects' frame tracking in sync
+
+        # Storage can only be cleared from the page that owns it, so do it before leaving the page
+        driver.execute_script("try { window.localStorage.clear(); window.sessionStorage.clear(); } catch (e) {}")
+        try:
+            driver.execute_cdp_cmd("Network.clearBrowserCookies", {})  # Cookies of every domain, not only the current one
+        except (AttributeError, WebDriverException):
+            driver.delete_all_cookies()
+        driver.get("about:blank")
+
+    def discard(self, driver):
+        """
+        Quits a session and forgets it.
+        """
+        self.uses.pop(id(driver), None)
+        self.slots.pop(id(driver), None)  # The replacement reuses the slot
+        try:
+            driver.quit()
+        except Exception:
+            pass  # The browser (or chromedriver) is already gone
+
+    def shutdown(self):
+        """
+        Quits every idle session at the end of the run.
+        """
+        while self.idle:
+            self.discard(self.idle.pop())
+
+    def report(self):
+        """
+        Returns a one-line summary of the pool metrics.
+        """
+        launches = len(self.launch_times)
+        average = sum(self.launch_times) / launches if launches else 0.0
+        return (f"Driver pool: {self.hits} hits, {self.misses} misses, {launches} launches "
+                f"(avg {average:.2f}s, total {sum(self.launch_times):.2f}s), "
+                f"{self.recycled} recycled, {self.crashed} crashed")
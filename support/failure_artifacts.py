@@ -0,0 +1,173 @@
+'''
+failure_artifacts.py (Failure artifacts)
+Saves what is needed to understand a failure without rerunning the scenario: a screenshot, the DOM
+of the current document, the browser console log and the last WebDriver commands with their timings
+(kept by the driver's CommandCounter).
+
+Only a failure costs anything: passing steps just add their commands to the counter's ring buffer.
+On a failure, the browser is read once (screenshot, page source, console log) and everything else
+(compression, file writes) happens on a background thread, so a failing step returns as soon as the
+data has been read. Each run (each parallel worker) writes at most config.ARTIFACT_MAX_MB; once the
+cap is reached, screenshots are dropped first, then DOM snapshots, and the skipped files are listed.
+
+Layout: <directory>/<nnn>-<name>/ with metadata.json.gz, dom.html.gz and screenshot.png.
+'''
+
+import base64
+import gzip
+import json
+import os
+import queue
+import re
+import threading
+import time
+import traceback
+
+from pages.base_page import frame_contexts
+from support.command_counter import counter_for
+
+
+def summarize_params(params, limit=200):
+    """
+    Short text form of a command's parameters (scripts and keys can be long).
+    """
+    text = json.dumps(params, default=str) if params else ""
+    return text if len(text) <= limit else text[:limit] + "..."
+
+
+class FailureArtifacts:
+    def __init__(self, directory, max_bytes, enabled=True):
+        """
+        :param directory: Directory the artifacts of this run are written to.
+        :param max_bytes: Maximum number of bytes written in this run.
+        :param enabled: A disabled instance captures nothing (see get_artifacts).
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self.written_bytes = 0
+        self.captures = 0
+        self.skipped_files = 0
+        self.queue = queue.Queue()
+        self.thread = None
+        self.lock = threading.Lock()
+
+    def capture(self, driver, name, error=None, step=None):
+        """
+        Reads the artifacts from the browser and queues them for writing.
+
+        :param name: What failed, e.g. '<scenario> / <step>' or 'VideoPage.logout'.
+        :param error: The exception, if any; its traceback is saved.
+        :param step: Text of the step that was running.
+        """
+        if not self.enabled:
+            return
+        # Copy the command history before the capture's own commands are added to it
+        commands = [
+            {"at": at, "command": command, "params": summarize_params(params), "duration_ms": duration * 1000,
+             "step": command_step, "error": command_error}
+            for at, command, params, duration, command_step, command_error in counter_for(driver).recent
+        ]
+        job = {
+            "name": name,
+            "time": time.time(),
+            "step": step,
+            "error": "".join(traceback.format_exception(type(error), error, error.__traceback__)) if error else None,
+            "frame": frame_contexts.get(driver),
+            "commands": commands,
+        }
+        # Each read is independent: a crashed tab or a closed window should not lose the rest
+        for key, read in (("url", lambda: driver.current_url),
+                          ("screenshot", driver.get_screenshot_as_base64),
+                          ("dom", lambda: driver.page_source),
+                          ("console", lambda: driver.get_log("browser"))):
+            try:
+                job[key] = read()
+            except Exception as read_error:
+                job[key] = None
+                job.setdefault("read_errors", {})[key] = f"{type(read_error).__name__}: {read_error}"
+
+        with self.lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.work, name="failure-artifacts", daemon=True)
+                self.thread.start()
+            self.captures += 1
+            job["index"] = self.captures
+        self.queue.put(job)
+
+    def work(self):
+        while True:
+            job = self.queue.get()
+            if job is None:
+                return
+            try:
+                self.write(job)
+            except Exception as error:
+                print(f"Could not write the failure artifacts of '{job['name']}': {error}")
+
+    def write(self, job):
+        """
+        Compresses a capture and writes what fits in the run's size cap.
+        """
+        slug = re.sub(r"[^A-Za-z0-9]+", "-", job["name"]).strip("-")[:60]
+        capture_dir = os.path.join(self.directory, f"{job['index']:03d}-{slug}")
+        os.makedirs(capture_dir, exist_ok=True)
+
+        # Decreasing priority: when the cap is reached, the screenshot is dropped first
+        files = []
+        if job.get("dom") is not None:
+            files.append(("dom.html.gz", gzip.compress(job["dom"].encode("utf-8"))))
+        if job.get("screenshot") is not None:
+            files.append(("screenshot.png", base64.b64decode(job["screenshot"])))  # PNG is already compressed
+
+        metadata = {key: job.get(key) for key in ("name", "time", "step", "url", "frame", "error", "read_errors", "console", "commands")}
+        metadata["skipped"] = []
+        written = []
+        for file_name, data in files:
+            if self.written_bytes + len(data) > self.max_bytes:
+                metadata["skipped"].append(file_name)
+                continue
+            written.append((file_name, data))
+            self.written_bytes += len(data)
+        # The metadata is small and always written, so the cap cannot hide what failed
+        written.insert(0, ("metadata.json.gz", gzip.compress(json.dumps(metadata, indent=2, default=str).encode("utf-8"))))
+        self.written_bytes += len(written[0][1])
+        self.skipped_files += len(metadata["skipped"])
+
+        for file_name, data in written:
+            with open(os.path.join(capture_dir, file_name), "wb") as artifact_file:
+                artifact_file.write(data)
+
+    def close(self, timeout=30):
+        """
+        Waits for the queued artifacts to be written.
+        """
+        if self.thread is not None:
+            self.queue.put(None)
+            self.thread.join(timeout)
+
+    def report(self):
+        if not self.captures:
+            return "Failure artifacts: none"
+        line = f"Failure artifacts: {self.captures} captures, {self.written_bytes / 1e6:.1f} MB in {self.directory}"
+        if self.skipped_files:
+            line += f" ({self.skipped_files} files skipped by the {self.max_bytes / 1e6:.0f} MB cap)"
+        return line
+
+
+_artifacts = FailureArtifacts(None, 0, enabled=False)
+
+
+def get_artifacts():
+    """
+    Returns the failure artifact writer of the current run (a disabled one if capture is off).
+    """
+    return _artifacts
+
+
+def set_artifacts(artifacts):
+    """
+    Installs the writer the hooks and page objects capture failures with.
+    """
+    global _artifacts
+    _artifacts = artifacts
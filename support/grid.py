@@ -0,0 +1,293 @@
+'''
+grid.py (Local Selenium Grid-compatible dispatcher)
+A small WebDriver endpoint that spreads browser sessions over local chromedriver processes
+("nodes"), each accepting a configured number of concurrent sessions ("slots"). Clients use it
+like a Selenium Grid or standalone server: webdriver.Remote(command_executor=<url>), which is what
+support/driver_factory.py does when a grid URL is configured.
+
+New session requests go to the least busy node with a free slot. When every slot is taken they
+wait in a first-come-first-served queue (up to config.GRID_QUEUE_TIMEOUT) instead of failing, so
+any number of workers can share the slots. Every other request of a session is forwarded to the
+node that owns it; DELETE /session/<id> frees the slot. Sessions themselves are reused by the
+driver pools (support/driver_pool.py): a pooled session keeps its slot across scenarios.
+
+Metrics: sessions served, queue wait times (p50/p95/max) and, per node, the slot utilisation
+(busy slot-seconds / available slot-seconds). GET /status answers like a Grid; GET /dispatcher/metrics
+returns the metrics as JSON.
+
+The remote sessions need Selenium 4.26+ (see RemoteChrome in support/driver_factory.py).
+
+Usage:
+    python -m support.grid [--nodes 2] [--slots 2] [--port 4444]
+    behave -D grid_url=http://127.0.0.1:4444      (or: python -m support.parallel_runner --grid)
+'''
+
+import argparse
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service
+
+import config
+
+
+class Node:
+    def __init__(self, name, slots, chromedriver=None):
+        """
+        :param name: Name used in the metrics.
+        :param slots: Number of concurrent sessions the node accepts.
+        :param chromedriver: Path of the chromedriver binary (found by Selenium Manager when None).
+        """
+        self.name = name
+        self.slots = slots
+        self.chromedriver = chromedriver
+        self.service = None
+        self.sessions = {}  # Session id -> time it started
+        self.reserved = 0  # Slots promised to session requests that are being created
+        self.served = 0
+        self.busy_seconds = 0.0  # Slot-seconds used by finished sessions
+        self.started = None
+
+    @property
+    def url(self):
+        return self.service.service_url
+
+    @property
+    def load(self):
+        return len(self.sessions) + self.reserved
+
+    def start(self):
+        path = self.chromedriver
+        if path is None:
+            # Selenium Manager's lookup (Selenium 4.20+), imported here so older versions can import this module
+            from selenium.webdriver.common.driver_finder import DriverFinder
+            path = DriverFinder(Service(), webdriver.ChromeOptions()).get_driver_path()
+        self.service = Service(executable_path=path)
+        self.service.start()  # Returns once chromedriver accepts connections
+        self.started = time.perf_counter()
+
+    def stop(self):
+        if self.service is not None:
+            self.service.stop()
+
+    def utilisation(self, now):
+        """
+        Share of the node's slot-seconds used by sessions since it started.
+        """
+        busy = self.busy_seconds + sum(now - started for started in self.sessions.values())
+        available = self.slots * (now - self.started)
+        return busy / available if available else 0.0
+
+
+class GridDispatcher:
+    def __init__(self, nodes=None, slots=None, port=0, queue_timeout=None, chromedriver=None):
+        """
+        :param nodes: Number of chromedriver processes (defaults to config.GRID_NODES).
+        :param slots: Concurrent sessions per node (defaults to config.GRID_SLOTS_PER_NODE).
+        :param port: Port to listen on (0 picks a free one).
+        :param queue_timeout: Seconds a new session request waits for a slot (defaults to config.GRID_QUEUE_TIMEOUT).
+        :param chromedriver: Path of the chromedriver binary (found by Selenium Manager when None).
+        """
+        nodes = config.GRID_NODES if nodes is None else nodes
+        slots = config.GRID_SLOTS_PER_NODE if slots is None else slots
+        self.nodes = [Node(f"node-{number + 1}", slots, chromedriver) for number in range(nodes)]
+        self.queue_timeout = config.GRID_QUEUE_TIMEOUT if queue_timeout is None else queue_timeout
+        self.owners = {}  # Session id -> Node
+        self.condition = threading.Condition()
+        self.waiting = 0  # Session requests in the queue
+        self.max_waiting = 0
+        self.queue_waits = []  # Seconds every session request waited for a slot
+        self.rejected = 0  # Requests that timed out in the queue
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), self.handler_class())
+        self.thread = None
+
+    @property
+    def url(self):
+        """
+        The URL to give webdriver.Remote (-D grid_url=...).
+        """
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}"
+
+    @property
+    def capacity(self):
+        return sum(node.slots for node in self.nodes)
+
+    def start(self):
+        for node in self.nodes:
+            node.start()
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        for node in self.nodes:
+            node.stop()
+
+    def reserve(self):
+        """
+        Waits for a free slot and reserves it on the least busy node.
+
+        :return: The Node, or None if no slot freed up within the queue timeout.
+        """
+        started = time.perf_counter()
+        with self.condition:
+            self.waiting += 1
+            self.max_waiting = max(self.max_waiting, self.waiting)
+            try:
+                while True:
+                    free = [node for node in self.nodes if node.load < node.slots]
+                    if free:
+                        node = min(free, key=lambda candidate: candidate.load / candidate.slots)
+                        node.reserved += 1
+                        self.queue_waits.append(time.perf_counter() - started)
+                        return node
+                    remaining = self.queue_timeout - (time.perf_counter() - started)
+                    if remaining <= 0:
+                        self.rejected += 1
+                        return None
+                    self.condition.wait(remaining)
+            finally:
+                self.waiting -= 1
+
+    def session_created(self, node, session_id):
+        with self.condition:
+            node.reserved -= 1
+            if session_id is not None:
+                node.sessions[session_id] = time.perf_counter()
+                node.served += 1
+                self.owners[session_id] = node
+            self.condition.notify()  # A failed creation frees its reservation
+
+    def session_deleted(self, session_id):
+        with self.condition:
+            node = self.owners.pop(session_id, None)
+            if node is not None:
+                node.busy_seconds += time.perf_counter() - node.sessions.pop(session_id)
+                self.condition.notify()
+
+    def metrics(self):
+        now = time.perf_counter()
+        waits = sorted(self.queue_waits)
+
+        def percentile(fraction):
+            return waits[max(0, int(round(fraction * len(waits))) - 1)] if waits else 0.0
+
+        return {
+            "capacity": self.capacity,
+            "sessions": sum(node.served for node in self.nodes),
+            "active": len(self.owners),
+            "queued_now": self.waiting,
+            "max_queued": self.max_waiting,
+            "rejected": self.rejected,
+            "queue_wait_p50": percentile(0.50),
+            "queue_wait_p95": percentile(0.95),
+            "queue_wait_max": waits[-1] if waits else 0.0,
+            "nodes": [{"name": node.name, "slots": node.slots, "active": len(node.sessions), "served": node.served,
+                       "utilisation": node.utilisation(now) if node.started else 0.0} for node in self.nodes],
+        }
+
+    def report(self):
+        metrics = self.metrics()
+        lines = [f"Grid: {metrics['sessions']} sessions on {metrics['capacity']} slots, queue wait "
+                 f"p50 {metrics['queue_wait_p50']:.2f}s / p95 {metrics['queue_wait_p95']:.2f}s / max {metrics['queue_wait_max']:.2f}s, "
+                 f"max {metrics['max_queued']} queued, {metrics['rejected']} timed out"]
+        lines.extend(f"  {node['name']}: {node['served']} sessions, {node['utilisation']:.0%} of {node['slots']} slots busy"
+                     for node in metrics["nodes"])
+        return "\n".join(lines)
+
+    def forward(self, node, method, path, body):
+        """
+        Sends a request to a node and returns (status, body bytes).
+        """
+        request = urllib.request.Request(node.url + path, data=body, method=method,
+                                         headers={"Content-Type": "application/json; charset=utf-8"})
+        try:
+            with urllib.request.urlopen(request, timeout=config.GRID_COMMAND_TIMEOUT) as response:
+                return response.status, response.read()
+        except urllib.error.HTTPError as error:
+            return error.code, error.read()  # WebDriver errors are JSON bodies with an error status
+
+    def handler_class(self):
+        dispatcher = self
+
+        class DispatcherHandler(BaseHTTPRequestHandler):
+            def reply(self, status, body):
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def error(self, status, error, message):
+                self.reply(status, json.dumps({"value": {"error": error, "message": message, "stacktrace": ""}}).encode())
+
+            def handle_request(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length") or 0)) or None
+                path = self.path.rstrip("/")
+                if self.command == "GET" and path == "/status":
+                    metrics = dispatcher.metrics()
+                    ready = metrics["active"] < metrics["capacity"]
+                    self.reply(200, json.dumps({"value": {"ready": ready, "message": "Local dispatcher", **metrics}}).encode())
+                    return
+                if self.command == "GET" and path == "/dispatcher/metrics":
+                    self.reply(200, json.dumps(dispatcher.metrics(), indent=2).encode())
+                    return
+                if self.command == "POST" and path == "/session":
+                    node = dispatcher.reserve()
+                    if node is None:
+                        self.error(500, "session not created", f"No free browser slot within {dispatcher.queue_timeout}s")
+                        return
+                    session_id = None
+                    try:
+                        status, response = dispatcher.forward(node, "POST", "/session", body)
+                        if status == 200:
+                            session_id = json.loads(response)["value"]["sessionId"]
+                    finally:
+                        dispatcher.session_created(node, session_id)
+                    self.reply(status, response)
+                    return
+                parts = path.split("/")
+                node = dispatcher.owners.get(parts[2]) if len(parts) > 2 and parts[1] == "session" else None
+                if node is None:
+                    self.error(404, "invalid session id", f"Unknown session for {self.path}")
+                    return
+                status, response = dispatcher.forward(node, self.command, self.path, body)
+                if self.command == "DELETE" and len(parts) == 3:
+                    dispatcher.session_deleted(parts[2])
+                self.reply(status, response)
+
+            do_GET = do_POST = do_DELETE = handle_request
+
+            def log_message(self, format, *args):
+                pass
+
+        return DispatcherHandler
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Dispatch WebDriver sessions over local chromedriver processes.")
+    parser.add_argument("--nodes", type=int, default=config.GRID_NODES, help="chromedriver processes")
+    parser.add_argument("--slots", type=int, default=config.GRID_SLOTS_PER_NODE, help="Concurrent sessions per node")
+    parser.add_argument("--port", type=int, default=4444)
+    parser.add_argument("--chromedriver", help="chromedriver binary (default: found by Selenium Manager)")
+    args = parser.parse_args(argv)
+
+    dispatcher = GridDispatcher(args.nodes, args.slots, args.port, chromedriver=args.chromedriver)
+    dispatcher.start()
+    print(f"Dispatching {dispatcher.capacity} slots on {dispatcher.url} (metrics: {dispatcher.url}/dispatcher/metrics)")
+    try:
+        while True:
+            time.sleep(60)
+    except KeyboardInterrupt:
+        print(dispatcher.report())
+        dispatcher.stop()
+
+
+if __name__ == "__main__":
+    main()
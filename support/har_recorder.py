@@ -0,0 +1,63 @@
+'''
+har_recorder.py (HTTP traffic recording)
+Stores the responses of a real run, bodies included, in a HAR-style archive that
+support/replay_server.py can serve afterwards. Requests are fed in by NetworkMonitor.collect,
+and bodies are fetched through the DevTools Network.getResponseBody command.
+'''
+
+import json
+import os
+from selenium.common.exceptions import WebDriverException
+
+
+class HarRecorder:
+    def __init__(self, base_url):
+        """
+        :param base_url: URL of the application under test; stored in the archive as the replay's main origin.
+        """
+        self.base_url = base_url
+        self.entries = []
+
+    def record(self, driver, request_id, request):
+        """
+        Adds a finished request and its response body to the archive.
+
+        :param request_id: DevTools request id, used to fetch the body.
+        :param request: Request dict built by NetworkMonitor (url, method, post_data, status, mime_type, headers).
+        """
+        if not request["url"].startswith(("http://", "https://")) or request.get("status") is None:
+            return  # data:, blob: and other URLs are never requested from a server
+        try:
+            body = driver.execute_cdp_cmd("Network.getResponseBody", {"requestId": request_id})
+        except WebDriverException:
+            # Redirects and some media requests have no body available; record them without one
+            body = {"body": "", "base64Encoded": False}
+
+        entry_request = {"method": request["method"], "url": request["url"]}
+        if request.get("post_data") is not None:
+            entry_request["postData"] = {"text": request["post_data"]}
+        self.entries.append({
+            "request": entry_request,
+            "response": {
+                "status": request["status"],
+                "headers": [{"name": name, "value": value} for name, value in request.get("headers", {}).items()],
+                "content": {
+                    "mimeType": request.get("mime_type") or "",
+                    "text": body["body"],
+                    **({"encoding": "base64"} if body["base64Encoded"] else {}),
+                },
+            },
+        })
+
+    def save(self, path):
+        """
+        Writes the archive in HAR 1.2 layout, with the application URL in log.comment.
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w") as archive_file:
+            json.dump({"log": {
+                "version": "1.2",
+                "creator": {"name": "Indee_automation_demo", "version": "1"},
+                "comment": self.base_url,
+                "entries": self.entries,
+            }}, archive_file)
@@ -0,0 +1,61 @@
+'''
+json_store.py (JSON files shared between processes)
+Helpers for the small JSON files several behave workers read and write at the same time (wait
+statistics, the login snapshot): an exclusive lock file around read-modify-write sequences, writes
+through a per-process temporary file renamed over the target, and reads that treat a missing or
+unreadable file as empty instead of failing every later run.
+'''
+
+import json
+import os
+import tempfile
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: writes stay atomic, but concurrent read-modify-writes are not serialized
+    fcntl = None
+
+
+@contextmanager
+def locked(path):
+    """
+    Holds an exclusive lock on `<path>.lock` (shared by every process of the machine) for the enclosed block.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path + ".lock", "a") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def read_json(path, default=None):
+    """
+    Returns the content of a JSON file, or `default` if it is missing or unreadable (e.g. truncated).
+    """
+    try:
+        with open(path) as json_file:
+            return json.load(json_file)
+    except (OSError, ValueError):
+        return default
+
+
+def write_json(path, data, **dump_args):
+    """
+    Replaces a JSON file atomically: readers see the old or the new content, never a partial one.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    # A temporary name per writer, so concurrent writers never rename each other's file
+    with tempfile.NamedTemporaryFile("w", dir=directory, prefix=os.path.basename(path) + ".",
+                                     suffix=".tmp", delete=False) as temporary_file:
+        json.dump(data, temporary_file, **dump_args)
+    try:
+        os.replace(temporary_file.name, path)
+    except OSError:
+        os.remove(temporary_file.name)
+        raise
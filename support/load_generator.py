@@ -0,0 +1,391 @@
+'''
+load_generator.py (Load generation)
+Replays the Given/When chain of a scenario (by default the one in features/video_playback.feature)
+as concurrent simulated viewers, to stress the streaming setup rather than to test it. Each viewer
+is a thread with its own browser session that runs the chain over and over with the regular step
+definitions, pausing between steps for a think time drawn from a distribution.
+
+Viewers start evenly spread over the ramp-up; after the duration no viewer starts a new iteration
+(running ones finish theirs). A failing step ends the viewer's iteration, is counted, and the next
+iteration starts from a blank session. The environment hooks are not run: every viewer logs in for
+real (so each iteration measures a login), and the driver pool, tracing, failure artifacts and
+command budgets are left out.
+
+Latencies are aggregated into percentile histograms: the login step, the time to first frame (Play
+click until the video plays, see VideoPage.play_video) and every step. The report is printed and
+written to reports/load-<time>.json.
+
+For repeatable capacity tests, run against the local stand-in server (--replay <archive>, see
+support/replay_server.py) with a fixed --seed; --grid spreads the sessions over a local dispatcher
+(support/grid.py) and --grid-url over a Selenium Grid.
+
+Usage:
+    python -m support.load_generator [--viewers 5] [--ramp-up 30] [--duration 300] [--think-time exponential:2]
+                                     [--player-control api] [--replay recordings/indee.har] [--seed 1]
+                                     [--grid | --grid-url <url>] [--scenario <name>] [features/video_playback.feature]
+'''
+
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import threading
+import time
+import traceback
+from collections import Counter
+
+from behave.configuration import Configuration
+from behave.runner import Context, Runner
+from behave.step_registry import registry
+
+import config
+from support.driver_factory import create_driver, check_remote_support
+from support.driver_pool import DriverPool
+from support.grid import GridDispatcher
+from support.page_registry import pages_for
+from support.parallel_runner import REPORT_DIR
+from support.prefix_runner import discover_scenarios
+from support.replay_server import ReplayServer
+
+FEATURE_FILE = os.path.join("features", "video_playback.feature")
+LOGIN_STEP = "I login with the provided PIN"  # Its duration is the login latency
+PLAY_STEP = "I play the video"  # After it, VideoPage.startup_seconds is the time to first frame
+HISTOGRAM_BOUNDS_MS = (100, 250, 500, 1000, 2000, 5000, 10000, 20000, 60000)  # Upper bounds of the histogram buckets
+
+
+def think_time(spec):
+    """
+    Parses a think-time distribution.
+
+    :param spec: 'constant:<s>', 'uniform:<min>:<max>', 'exponential:<mean>' or 'normal:<mean>:<sd>' (seconds).
+    :return: Function drawing a number of seconds (never negative) from a random.Random.
+    """
+    name, *values = spec.split(":")
+    values = [float(value) for value in values]
+    distributions = {
+        "constant": (1, lambda rng, seconds: seconds),
+        "uniform": (2, lambda rng, low, high: rng.uniform(low, high)),
+        "exponential": (1, lambda rng, mean: rng.expovariate(1 / mean) if mean > 0 else 0.0),
+        "normal": (2, lambda rng, mean, deviation: rng.gauss(mean, deviation)),
+    }
+    if name not in distributions or len(values) != distributions[name][0]:
+        raise ValueError(f"Invalid think time '{spec}', expected one of constant:<s>, uniform:<min>:<max>, "
+                         f"exponential:<mean> or normal:<mean>:<sd>")
+    draw = distributions[name][1]
+    return lambda rng: max(0.0, draw(rng, *values))
+
+
+class Histogram:
+    def __init__(self):
+        self.values = []  # Seconds
+
+    def record(self, seconds):
+        self.values.append(seconds)
+
+    def percentile(self, fraction):
+        """
+        Nearest-rank percentile, in seconds.
+        """
+        ordered = sorted(self.values)
+        return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+    def buckets(self):
+        """
+        Number of values per bucket, as a list of (label, count).
+        """
+        counts = Counter()
+        for seconds in self.values:
+            counts[next((bound for bound in HISTOGRAM_BOUNDS_MS if seconds * 1000 <= bound), None)] += 1
+        labels = [(bound, f"<= {bound / 1000:g}s") for bound in HISTOGRAM_BOUNDS_MS]
+        labels.append((None, f"> {HISTOGRAM_BOUNDS_MS[-1] / 1000:g}s"))
+        return [(label, counts[bound]) for bound, label in labels]
+
+    def to_dict(self):
+        return {
+            "count": len(self.values),
+            "mean_ms": sum(self.values) / len(self.values) * 1000,
+            **{f"p{int(fraction * 100)}_ms": self.percentile(fraction) * 1000 for fraction in (0.50, 0.90, 0.95, 0.99)},
+            "max_ms": max(self.values) * 1000,
+            "buckets": dict(self.buckets()),
+        }
+
+
+class LoadMetrics:
+    def __init__(self):
+        self.histograms = {}  # Metric name -> Histogram, e.g. 'login', 'time_to_first_frame', 'step: I play the video'
+        self.errors = Counter()  # (step, error type) -> count
+        self.error_samples = {}  # (step, error type) -> the first traceback seen
+        self.iterations = Counter()  # 'passed' / 'failed'
+        self.active_viewers = 0
+        self.max_active_viewers = 0
+        self.lock = threading.Lock()
+
+    def record(self, name, seconds):
+        with self.lock:
+            self.histograms.setdefault(name, Histogram()).record(seconds)
+
+    def error(self, step_name, error):
+        key = (step_name, type(error).__name__)
+        with self.lock:
+            self.errors[key] += 1
+            self.error_samples.setdefault(key, "".join(traceback.format_exception(type(error), error, error.__traceback__)))
+
+    def iteration(self, passed):
+        with self.lock:
+            self.iterations["passed" if passed else "failed"] += 1
+
+    def viewer_started(self):
+        with self.lock:
+            self.active_viewers += 1
+            self.max_active_viewers = max(self.max_active_viewers, self.active_viewers)
+
+    def viewer_stopped(self):
+        with self.lock:
+            self.active_viewers -= 1
+
+    def to_dict(self, elapsed):
+        return {
+            "elapsed_seconds": elapsed,
+            "max_active_viewers": self.max_active_viewers,
+            "iterations": dict(self.iterations),
+            "iterations_per_minute": sum(self.iterations.values()) / elapsed * 60 if elapsed else 0.0,
+            "latencies": {name: histogram.to_dict() for name, histogram in sorted(self.histograms.items())},
+            "errors": [{"step": step, "error": error, "count": count, "first": self.error_samples[(step, error)]}
+                       for (step, error), count in self.errors.most_common()],
+        }
+
+    def report(self, elapsed):
+        """
+        Returns a text summary: latency percentiles, the histograms of the login and the time to first frame, and the errors.
+        """
+        lines = [f"{sum(self.iterations.values())} iterations in {elapsed:.0f}s ({self.iterations['passed']} passed, "
+                 f"{self.iterations['failed']} failed), up to {self.max_active_viewers} concurrent viewers",
+                 f"  {'p50 (s)':>8} {'p90 (s)':>8} {'p95 (s)':>8} {'p99 (s)':>8} {'max (s)':>8} {'count':>6}  metric"]
+        # Headline metrics first, then the steps in alphabetical order
+        names = sorted(self.histograms, key=lambda name: (name.startswith("step: "), name))
+        for name in names:
+            histogram = self.histograms[name]
+            lines.append(f"  {histogram.percentile(0.50):>8.2f} {histogram.percentile(0.90):>8.2f} "
+                         f"{histogram.percentile(0.95):>8.2f} {histogram.percentile(0.99):>8.2f} "
+                         f"{max(histogram.values):>8.2f} {len(histogram.values):>6}  {name}")
+        for name in ("login", "time_to_first_frame"):
+            if name in self.histograms:
+                histogram = self.histograms[name]
+                lines.append(f"{name}:")
+                for label, count in histogram.buckets():
+                    lines.append(f"  {label:>8} {count:>6} {'#' * math.ceil(40 * count / len(histogram.values))}")
+        for (step, error), count in self.errors.most_common():
+            lines.append(f"ERROR x{count} in '{step}': {error}")
+        return "\n".join(lines)
+
+
+class Viewer(threading.Thread):
+    def __init__(self, viewer_id, runner, steps, metrics, start_at, stop_at, stopping, settings):
+        """
+        :param runner: behave Runner whose step definitions are loaded.
+        :param steps: The steps of one iteration.
+        :param start_at: time.perf_counter() value at which the viewer starts (its place in the ramp-up).
+        :param stop_at: time.perf_counter() value after which no new iteration starts.
+        :param stopping: Event set to stop every viewer early (Ctrl+C).
+        :param settings: The parsed command line (profile, player control, think time, seed, ...).
+        """
+        super().__init__(name=f"viewer-{viewer_id}", daemon=True)
+        self.viewer_id = viewer_id
+        self.runner = runner
+        self.steps = steps
+        self.metrics = metrics
+        self.start_at = start_at
+        self.stop_at = stop_at
+        self.stopping = stopping
+        self.settings = settings
+        self.think = think_time(settings.think_time)
+        self.rng = random.Random(settings.seed * 1000 + viewer_id)  # Same think times for the same seed
+        self.driver = None
+        self.iterations = 0
+
+    def should_stop(self):
+        return (self.stopping.is_set() or time.perf_counter() >= self.stop_at
+                or (self.settings.iterations and self.iterations >= self.settings.iterations))
+
+    def start_browser(self):
+        # A cache directory per viewer (for profiles with one), reused by the viewer's next browsers
+        self.driver = create_driver(self.settings.profile, remote_url=self.settings.grid_url,
+                                    cache_name=f"viewer-{self.viewer_id}")
+
+    def quit_browser(self):
+        if self.driver is not None:
+            try:
+                self.driver.quit()
+            except Exception:
+                pass  # The browser is already gone, or its chromedriver is (connection errors)
+            self.driver = None
+
+    def new_context(self):
+        """
+        A behave context with what the hooks would otherwise set up for the steps.
+        """
+        context = Context(self.runner)
+        context.driver = self.driver
+        context.pages = pages_for(self.driver, self.settings.player_control, self.settings.qoe)
+        context.tags = set()
+        context.session_cache = None  # Every iteration logs in, so the login is measured
+        context.qoe_mode = self.settings.qoe
+        context.qoe_report = None
+        context.command_budget_mode = "off"
+        return context
+
+    def run_iteration(self):
+        """
+        Runs the steps once. A failing step ends the iteration.
+
+        :return: True if every step passed.
+        """
+        context = self.new_context()
+        for index, step in enumerate(self.steps):
+            if index > 0 and self.stopping.wait(self.think(self.rng)):
+                return False
+            context.current_step_name = step.name
+            context.table = step.table
+            context.text = step.text
+            started = time.perf_counter()
+            try:
+                match = registry.find_match(step)
+                if match is None:
+                    raise NotImplementedError(f"Undefined step: {step.keyword} {step.name}")
+                match.run(context)
+            except Exception as error:
+                self.metrics.error(step.name, error)
+                return False
+            duration = time.perf_counter() - started
+            self.metrics.record(f"step: {step.name}", duration)
+            if step.name == LOGIN_STEP:
+                self.metrics.record("login", duration)
+            elif step.name == PLAY_STEP and context.pages.video.startup_seconds is not None:
+                self.metrics.record("time_to_first_frame", context.pages.video.startup_seconds)
+        return True
+
+    def run(self):
+        if self.stopping.wait(max(0.0, self.start_at - time.perf_counter())):
+            return
+        self.metrics.viewer_started()
+        try:
+            while not self.should_stop():
+                if self.driver is None:
+                    try:
+                        self.start_browser()
+                    except Exception as error:
+                        self.metrics.error("start the browser", error)
+                        return
+                passed = self.run_iteration()
+                self.iterations += 1
+                self.metrics.iteration(passed)
+                try:
+                    DriverPool.reset(self.driver)  # The next iteration starts logged out, on a blank page
+                except Exception:  # WebDriverException, or a connection error (urllib3) when chromedriver itself died
+                    self.quit_browser()  # Crashed or unresponsive: the next iteration gets a new browser
+        finally:
+            self.quit_browser()
+            self.metrics.viewer_stopped()
+
+
+def load_steps(path, scenario_name=None):
+    """
+    The Given/When steps of a scenario (background included), i.e. the chain without its Then checks.
+
+    :param scenario_name: Name of the scenario (default: the first one of the file).
+    """
+    scenarios = discover_scenarios([path])
+    if scenario_name:
+        scenarios = [scenario for scenario in scenarios if scenario.name == scenario_name]
+    if not scenarios:
+        raise ValueError(f"No scenario {scenario_name or ''} in {path}")
+    # Steps after And/But keep the type of the step they follow
+    return [step for step in scenarios[0].all_steps if step.step_type in ("given", "when")]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay a scenario as concurrent simulated viewers.")
+    parser.add_argument("feature", nargs="?", default=FEATURE_FILE)
+    parser.add_argument("--scenario", help="Scenario name (default: the first one)")
+    parser.add_argument("--viewers", type=int, default=config.LOAD_VIEWERS)
+    parser.add_argument("--ramp-up", type=float, default=config.LOAD_RAMP_UP, help="Seconds to start every viewer")
+    parser.add_argument("--duration", type=float, default=config.LOAD_DURATION, help="Seconds after which no iteration starts")
+    parser.add_argument("--iterations", type=int, default=0, help="Maximum iterations per viewer (0: until the duration)")
+    parser.add_argument("--think-time", default=config.LOAD_THINK_TIME, help="Distribution of the pause between steps")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the think times (and of the replay jitter)")
+    parser.add_argument("--profile", default=config.LOAD_PROFILE, choices=sorted(config.BROWSER_PROFILES))
+    parser.add_argument("--player-control", choices=["ui", "api"], default=config.PLAYER_CONTROL)
+    parser.add_argument("--qoe", choices=["fail", "warn", "off"], default="off", help="QoE checks of the playback steps")
+    parser.add_argument("--replay", help="Archive served by a local stand-in server (support/replay_server.py)")
+    parser.add_argument("--replay-latency-ms", type=float, default=0)
+    parser.add_argument("--replay-jitter-ms", type=float, default=0)
+    parser.add_argument("--base-url", help="Application URL (default: config.BASE_URL)")
+    parser.add_argument("--grid", action="store_true", help="Start the sessions on a local dispatcher (support/grid.py)")
+    parser.add_argument("--grid-url", default=config.GRID_URL, help="Selenium Grid/standalone URL")
+    parser.add_argument("--output", help="JSON report path (default: reports/load-<time>.json)")
+    args = parser.parse_args(argv)
+    think_time(args.think_time)  # Fail on a bad distribution before starting anything
+
+    steps = load_steps(args.feature, args.scenario)
+    runner = Runner(Configuration([args.feature]))
+    runner.setup_paths()
+    runner.load_step_definitions()
+
+    if args.grid or args.grid_url:
+        check_remote_support()
+
+    replay_server = grid = None
+    if args.replay:
+        replay_server = ReplayServer(args.replay, latency_ms=args.replay_latency_ms,
+                                     jitter_ms=args.replay_jitter_ms, seed=args.seed).start()
+        config.BASE_URL = replay_server.url
+    elif args.base_url:
+        config.BASE_URL = args.base_url
+    if args.grid and not args.grid_url:
+        grid = GridDispatcher()
+        grid.start()
+        args.grid_url = grid.url
+
+    metrics = LoadMetrics()
+    stopping = threading.Event()
+    started = time.perf_counter()
+    stop_at = started + args.duration
+    viewers = [
+        Viewer(viewer_id, runner, steps, metrics, started + args.ramp_up * viewer_id / args.viewers, stop_at,
+               stopping, args)
+        for viewer_id in range(args.viewers)
+    ]
+    print(f"{args.viewers} viewers over {args.ramp_up:g}s, for {args.duration:g}s, against {config.BASE_URL} "
+          f"({len(steps)} steps per iteration, think time {args.think_time})")
+    for viewer in viewers:
+        viewer.start()
+    try:
+        for viewer in viewers:
+            while viewer.is_alive():
+                viewer.join(1)  # A timed join keeps Ctrl+C responsive
+    except KeyboardInterrupt:
+        print("Stopping: the viewers finish their current step")
+        stopping.set()
+        for viewer in viewers:
+            viewer.join()
+    finally:
+        elapsed = time.perf_counter() - started
+        if grid is not None:
+            print(grid.report())
+            grid.stop()
+        if replay_server is not None:
+            replay_server.stop()
+
+    print(metrics.report(elapsed))
+    output = args.output or os.path.join(REPORT_DIR, f"load-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as output_file:
+        json.dump({"settings": vars(args), "base_url": config.BASE_URL, **metrics.to_dict(elapsed)}, output_file, indent=2)
+    print(f"Load report written to {output}")
+    return 1 if metrics.iterations["failed"] or not metrics.iterations else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+'''
+network.py (Network blocking and request metrics)
+Uses the Chrome DevTools Protocol to block URL patterns (analytics, third-party fonts, ...) and
+reads Chrome's performance log to record every request's timing, transferred bytes and whether it
+was served from the browser cache. Sessions are started with a persistent disk cache directory,
+so static assets downloaded in one run are served locally in the next ones (one cache directory per
+driver pool slot, reused when the pool replaces a session).
+Chrome's own disk cache is used rather than a content-addressed store of our own: serving assets
+from such a store would be possible through the DevTools Fetch domain over driver.bidi_connection(),
+but it puts a Python round trip in front of every request of the page and depends on the
+version-specific CDP bindings of the installed Selenium; the disk cache needs neither.
+'''
+
+import json
+from urllib.parse import urlparse
+
+
+def enable_performance_log(options):
+    """
+    Asks chromedriver to record DevTools network events, read later by NetworkMonitor.collect.
+    """
+    logging_prefs = dict(options.to_capabilities().get("goog:loggingPrefs", {}))
+    logging_prefs["performance"] = "ALL"
+    options.set_capability("goog:loggingPrefs", logging_prefs)
+
+
+def block_urls(driver, patterns):
+    """
+    Makes the browser fail every request whose URL matches one of the patterns ('*' wildcards).
+    """
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": list(patterns)})
+
+
+class NetworkMonitor:
+    def __init__(self):
+        self.requests = []  # One dict per finished, failed or blocked request
+        self.pending = {}  # Requests not finished yet, keyed by (id(driver), DevTools request id)
+
+    def collect(self, driver, scenario=None, recorder=None):
+        """
+        Drains the session's performance log and records the requests it describes.
+        Call it at least once per scenario, as the log is only kept until it is read.
+
+        :param scenario: Name recorded with each request.
+        :param recorder: Optional HarRecorder that also stores each finished response with its body.
+        """
+        try:
+            entries = driver.get_log("performance")
+        except Exception:
+            return  # The session (or chromedriver) is gone, or it was started without the performance log
+
+        for entry in entries:
+            message = json.loads(entry["message"])["message"]
+            method, params = message["method"], message.get("params", {})
+            key = (id(driver), params.get("requestId"))
+            if method == "Network.requestWillBeSent":
+                request = params["request"]
+                self.pending[key] = {"url": request["url"], "method": request["method"],
+                                     "post_data": request.get("postData"), "start": params["timestamp"],
+                                     "cached": False, "scenario": scenario}
+            elif key not in self.pending:
+                continue
+            elif method == "Network.requestServedFromCache":
+                self.pending[key]["cached"] = True
+            elif method == "Network.responseReceived":
+                response = params["response"]
+                request = self.pending[key]
+                request.update(status=response.get("status"), mime_type=response.get("mimeType"),
+                               headers=response.get("headers", {}))
+                request["cached"] = request["cached"] or response.get("fromDiskCache", False)
+            elif method in ("Network.loadingFinished", "Network.loadingFailed"):
+                request = self.pending.pop(key)
+                request["duration"] = params["timestamp"] - request.pop("start")
+                request["bytes"] = params.get("encodedDataLength", 0)
+                if method == "Network.loadingFailed":
+                    request["blocked"] = params.get("blockedReason") is not None
+                    request["error"] = params.get("errorText")
+                elif recorder is not None:
+                    recorder.record(driver, params["requestId"], request)
+                # Headers and request bodies are only needed for recording; keep the metrics small
+                request.pop("headers", None)
+                request.pop("post_data", None)
+                self.requests.append(request)
+
+    def write_jsonl(self, path):
+        """
+        Writes one JSON object per request.
+        """
+        with open(path, "w") as log_file:
+            for request in self.requests:
+                log_file.write(json.dumps(request) + "\n")
+
+    def report(self, top=5):
+        """
+        Returns a summary: request count, bytes, cache hit rate, blocked requests and the heaviest hosts.
+        """
+        loaded = [request for request in self.requests if not request.get("blocked")]
+        if not self.requests:
+            return "Network: no requests recorded."
+        hits = sum(1 for request in loaded if request["cached"])
+        blocked = len(self.requests) - len(loaded)
+        hosts = {}
+        for request in loaded:
+            count, size, duration = hosts.get(urlparse(request["url"]).netloc, (0, 0, 0.0))
+            hosts[urlparse(request["url"]).netloc] = (count + 1, size + request["bytes"], duration + request["duration"])
+
+        lines = [f"Network: {len(loaded)} requests, {sum(request['bytes'] for request in loaded) / 2 ** 20:.2f} MB transferred, "
+                 f"cache hit rate {hits / len(loaded) if loaded else 0:.0%}, {blocked} blocked"]
+        for host, (count, size, duration) in sorted(hosts.items(), key=lambda item: item[1][1], reverse=True)[:top]:
+            lines.append(f"  {host:<40} {count:>5} requests {size / 2 ** 20:>8.2f} MB {duration:>8.2f}s")
+        return "\n".join(lines)
@@ -0,0 +1,79 @@
+'''
+page_registry.py (Page objects of a driver session)
+Creates each page object once per driver session instead of once per step. The step definitions
+reach the pages through `context.pages` (set up in features/environment.py), e.g.
+`context.pages.video.pause_video()`.
+
+Page objects keep no document state of their own: their locators are class-level constants and the
+elements they resolve are cached per driver (see pages/base_page.py). A registry therefore stays
+valid for the whole life of its driver; after a navigation call `invalidate()` so the cached
+elements of the old document are dropped. Driver pool resets and prefix-runner restores do this
+through reset_frame_context.
+'''
+
+import weakref
+
+from pages.base_page import reset_frame_context
+from pages.login_page import LoginPage
+from pages.logout_page import LogoutPage
+from pages.project_page import ProjectPage
+from pages.video_page import VideoPage
+
+# Registry of each live driver; a new driver gets a new registry, a discarded one takes its registry with it
+registries = weakref.WeakKeyDictionary()
+
+
+class PageRegistry:
+    def __init__(self, driver, player_control=None, qoe_mode=None):
+        """
+        :param driver: Selenium WebDriver instance the page objects operate.
+        :param player_control: 'ui' or 'api', passed to VideoPage (defaults to config.PLAYER_CONTROL).
+        :param qoe_mode: 'fail', 'warn' or 'off', passed to VideoPage (defaults to config.QOE_MODE).
+        """
+        self.driver = driver
+        self.player_control = player_control
+        self.qoe_mode = qoe_mode
+        self.pages = {}  # Page class -> its page object
+
+    def get(self, page_class, **kwargs):
+        """
+        Returns the page object of the given class, creating it on first use.
+
+        :param kwargs: Extra constructor arguments, only used when the page is created.
+        """
+        page = self.pages.get(page_class)
+        if page is None:
+            page = self.pages[page_class] = page_class(self.driver, **kwargs)
+        return page
+
+    @property
+    def login(self):
+        return self.get(LoginPage)
+
+    @property
+    def project(self):
+        return self.get(ProjectPage)
+
+    @property
+    def video(self):
+        return self.get(VideoPage, control_mode=self.player_control, qoe_mode=self.qoe_mode)
+
+    @property
+    def logout(self):
+        return self.get(LogoutPage)
+
+    def invalidate(self):
+        """
+        Records that the driver navigated: it is back on the top-level document and the cached elements are gone.
+        """
+        reset_frame_context(self.driver)
+
+
+def pages_for(driver, player_control=None, qoe_mode=None):
+    """
+    Returns the page registry of a driver, creating it the first time the driver is seen.
+    """
+    registry = registries.get(driver)
+    if registry is None or registry.player_control != player_control or registry.qoe_mode != qoe_mode:
+        registry = registries[driver] = PageRegistry(driver, player_control, qoe_mode)
+    return registry
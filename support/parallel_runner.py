@@ -0,0 +1,219 @@
+'''
+parallel_runner.py (Parallel scenario runner)
+Shards the scenarios (or feature files) of features/ across N behave worker processes.
+Each worker gets its own Chrome profile and download directory, and the per-worker JSON reports
+are merged into a single behave-compatible JSON report.
+With --grid, the workers' browser sessions are started on a dispatcher over local chromedriver
+processes (support/grid.py); by default there is one worker per browser slot, so every slot is used.
+
+Usage:
+    python -m support.parallel_runner --workers 4 [--shard-by scenario|feature] [features/...] [-- <extra behave args>]
+    python -m support.parallel_runner --grid [--grid-nodes 2] [--grid-slots 2] [features/...]
+'''
+
+import argparse
+import glob
+import json
+import os
+import shutil
+import subprocess
+import sys
+
+from behave.parser import parse_file
+
+import config
+from support.driver_factory import check_remote_support
+from support.grid import GridDispatcher
+
+REPORT_DIR = "reports"  # Where worker logs, worker reports and the merged report are written
+PROFILE_ROOT = ".browser-profiles"  # Parent directory of the per-worker Chrome profiles and downloads
+SESSION_CACHE_FILE = os.path.join(PROFILE_ROOT, "session.json")  # Login snapshot shared by all workers of a run
+
+
+def find_feature_files(paths):
+    """
+    Expands directories into the feature files they contain.
+    """
+    feature_files = []
+    for path in paths:
+        if os.path.isdir(path):
+            feature_files.extend(sorted(glob.glob(os.path.join(path, "**", "*.feature"), recursive=True)))
+        else:
+            feature_files.append(path)
+    return feature_files
+
+
+def discover_locations(paths, shard_by="scenario"):
+    """
+    Lists the behave locations to distribute across workers.
+
+    :param paths: Feature files or directories containing them.
+    :param shard_by: 'scenario' for one "file:line" per scenario, 'feature' for one location per feature file.
+    :return: List of location strings accepted by the behave command line.
+    """
+    locations = []
+    for feature_file in find_feature_files(paths):
+        if shard_by == "feature":
+            locations.append(feature_file)
+            continue
+        feature = parse_file(feature_file)
+        if feature is None:  # Empty feature file
+            continue
+        locations.extend(f"{feature_file}:{scenario.line}" for scenario in feature.walk_scenarios())
+    return locations
+
+
+def shard(locations, workers):
+    """
+    Splits the locations round-robin into at most `workers` non-empty shards.
+    """
+    shards = [locations[index::workers] for index in range(workers)]
+    return [locations for locations in shards if locations]
+
+
+def worker_defines(worker_id):
+    """
+    Returns the behave '--define' arguments giving a worker its own, freshly emptied, browser
+    profile and download directory, and the run's shared login snapshot.
+    """
+    worker_root = os.path.join(PROFILE_ROOT, f"worker-{worker_id}")
+    shutil.rmtree(worker_root, ignore_errors=True)  # Every run starts from a clean profile
+    return [
+        "--define", f"worker_id={worker_id}",
+        "--define", f"profile_dir={os.path.join(worker_root, 'profile')}",
+        "--define", f"download_dir={os.path.join(worker_root, 'downloads')}",
+        "--define", f"session_cache_file={SESSION_CACHE_FILE}",
+    ]
+
+
+def start_worker(worker_id, locations, behave_args):
+    """
+    Starts one behave process for a shard, with its own browser profile and download directory.
+
+    :return: Tuple of (Popen, path of the worker's JSON report, open log file).
+    """
+    report_path = os.path.join(REPORT_DIR, f"worker-{worker_id}.json")
+    log_file = open(os.path.join(REPORT_DIR, f"worker-{worker_id}.log"), "w")
+    command = [
+        sys.executable, "-m", "behave", *locations,
+        "--format", "json", "--outfile", report_path,
+        *worker_defines(worker_id),
+        *behave_args,
+    ]
+    process = subprocess.Popen(command, stdout=log_file, stderr=subprocess.STDOUT)
+    return process, report_path, log_file
+
+
+def merge_reports(report_paths):
+    """
+    Merges per-worker behave JSON reports; scenarios of the same feature file end up in one feature entry.
+
+    :return: List of features in behave's JSON report format.
+    """
+    features = {}
+    for report_path in report_paths:
+        if not os.path.exists(report_path) or os.path.getsize(report_path) == 0:
+            continue  # The worker crashed before writing its report
+        with open(report_path) as report_file:
+            for feature in json.load(report_file):
+                merged = features.setdefault(feature["location"], dict(feature, elements=[]))
+                merged["elements"].extend(feature.get("elements", []))
+                if feature.get("status") == "failed":
+                    merged["status"] = "failed"
+
+    for feature in features.values():
+        # Keep the scenarios in file order, whatever worker ran them
+        feature["elements"].sort(key=lambda element: int(element.get("location", ":0").rsplit(":", 1)[1]))
+    return sorted(features.values(), key=lambda feature: feature["location"])
+
+
+def summarize(features):
+    """
+    Counts scenario statuses in a merged report.
+    """
+    counts = {}
+    for feature in features:
+        for element in feature.get("elements", []):
+            if element.get("type") == "background":
+                continue
+            status = element.get("status", "untested")
+            counts[status] = counts.get(status, 0) + 1
+    return counts
+
+
+def run_locations(locations, workers, behave_args, output, label="scenario"):
+    """
+    Runs behave locations across worker processes and merges their reports.
+
+    :param locations: Behave locations ("file:line" or feature files), in the order they should start.
+    :param workers: Maximum number of worker processes.
+    :param behave_args: Extra behave command line arguments for every worker.
+    :param output: Path of the merged JSON report.
+    :param label: What a location is, for the progress message.
+    :return: Tuple of (exit code, merged features in behave's JSON report format).
+    """
+    os.makedirs(REPORT_DIR, exist_ok=True)
+    if os.path.exists(SESSION_CACHE_FILE):
+        os.remove(SESSION_CACHE_FILE)  # Logins are shared within a run, never across runs
+    started = [start_worker(worker_id, shard_locations, behave_args)
+               for worker_id, shard_locations in enumerate(shard(locations, max(1, workers)))]
+    print(f"Running {len(locations)} {label}(s) on {len(started)} worker(s).")
+
+    exit_code = 0
+    for worker_id, (process, _, log_file) in enumerate(started):
+        return_code = process.wait()
+        log_file.close()
+        if return_code != 0:
+            print(f"Worker {worker_id} failed (exit code {return_code}), see {log_file.name}")
+        exit_code = max(exit_code, return_code)
+
+    features = merge_reports([report_path for _, report_path, _ in started])
+    with open(output, "w") as output_file:
+        json.dump(features, output_file, indent=2)
+    return exit_code, features
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run behave scenarios across parallel worker processes.")
+    parser.add_argument("paths", nargs="*", default=["features"], help="Feature files or directories (default: features)")
+    parser.add_argument("--workers", type=int, help="Number of worker processes (default: CPU count, or the grid's slots)")
+    parser.add_argument("--shard-by", choices=["scenario", "feature"], default="scenario")
+    parser.add_argument("--output", default=os.path.join(REPORT_DIR, "report.json"), help="Merged JSON report path")
+    parser.add_argument("--grid", action="store_true", help="Start the browser sessions on a local dispatcher")
+    parser.add_argument("--grid-nodes", type=int, default=config.GRID_NODES, help="chromedriver processes of the dispatcher")
+    parser.add_argument("--grid-slots", type=int, default=config.GRID_SLOTS_PER_NODE, help="Sessions per chromedriver")
+    argv = sys.argv[1:] if argv is None else argv
+    behave_args = []
+    if "--" in argv:  # Everything after '--' is passed to every behave worker unchanged
+        behave_args = argv[argv.index("--") + 1:]
+        argv = argv[:argv.index("--")]
+    args = parser.parse_args(argv)
+
+    locations = discover_locations(args.paths, args.shard_by)
+    if not locations:
+        print("No scenarios found.")
+        return 0
+
+    grid = None
+    workers = args.workers or os.cpu_count() or 1
+    if args.grid:
+        check_remote_support()  # Before starting anything, not in every worker
+        grid = GridDispatcher(args.grid_nodes, args.grid_slots)
+        grid.start()
+        workers = args.workers or grid.capacity
+        behave_args = ["--define", f"grid_url={grid.url}", *behave_args]
+    try:
+        exit_code, features = run_locations(locations, workers, behave_args, args.output, args.shard_by)
+    finally:
+        if grid is not None:
+            print(grid.report())
+            grid.stop()
+
+    counts = summarize(features)
+    print(", ".join(f"{count} {status}" for status, count in sorted(counts.items())) or "No results.")
+    print(f"Merged report written to {args.output}")
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,271 @@
+'''
+prefix_runner.py (Shared-prefix scenario runner)
+Runs scenarios as a tree of step prefixes instead of one after another. Scenarios that start with
+the same steps (e.g. login page, PIN login, open the Test Automation Project) share one execution of
+that prefix; where they diverge, the browser state (URL, cookies, local/sessionStorage) is saved in
+a checkpoint and restored before each branch, and the behave context is layered so that what one
+branch sets on it is gone for the next. The total number of step executions grows with the number
+of distinct paths, not with scenarios times steps.
+
+It uses the regular step definitions and features/environment.py hooks. Scenarios with different
+tags never share a prefix, as tags can change what steps do (@real_login, @browser.<name>). Each tag
+group gets one browser session (before_scenario/after_scenario run once per group). Only browser
+state is checkpointed: a branch starting after "I play the video" gets the video page reloaded, not
+a playing video.
+
+Usage:
+    python -m support.prefix_runner [features/...] [--workers N] [-- <behave args, e.g. -D player_control=api>]
+'''
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+from behave.configuration import Configuration
+from behave.model_core import Status
+from behave.parser import parse_file
+from behave.runner import Context, Runner
+from behave.step_registry import registry
+
+from pages.base_page import reset_frame_context
+from support.driver_pool import DriverPool
+from support.parallel_runner import REPORT_DIR, find_feature_files, worker_defines
+from support.session_cache import capture_state, restore_state
+
+
+def step_key(step):
+    """
+    What makes two steps the same: type, text, doc string and table.
+    """
+    table = None
+    if step.table is not None:
+        table = (tuple(step.table.headings), tuple(tuple(row.cells) for row in step.table.rows))
+    return (step.step_type, step.name, step.text, table)
+
+
+class Node:
+    def __init__(self, step=None):
+        self.step = step  # The step leading to this node (None for a root)
+        self.children = {}  # Next steps, keyed by step_key, in first-seen order
+        self.scenarios = []  # Scenarios whose last step leads to this node
+
+    def all_scenarios(self):
+        """
+        Every scenario ending at this node or below it.
+        """
+        scenarios = list(self.scenarios)
+        for child in self.children.values():
+            scenarios.extend(child.all_scenarios())
+        return scenarios
+
+
+def build_tree(scenarios):
+    """
+    Builds one prefix tree per tag set.
+
+    :return: Dict mapping a sorted tuple of tags to the root Node of its tree.
+    """
+    roots = {}
+    for scenario in scenarios:
+        node = roots.setdefault(tuple(sorted(scenario.effective_tags)), Node())
+        for step in scenario.all_steps:  # Background steps first, like behave
+            node = node.children.setdefault(step_key(step), Node(step))
+        node.scenarios.append(scenario)
+    return roots
+
+
+def branch_units(scenarios):
+    """
+    Groups scenarios by the branch they take at their tree's first divergence. Units are what
+    workers share out; every worker runs the common prefix of its units once.
+
+    :return: List of scenario lists, in a deterministic order.
+    """
+    units = []
+    for root in build_tree(scenarios).values():
+        node = root
+        while len(node.children) == 1 and not node.scenarios:
+            node = next(iter(node.children.values()))
+        units.extend([scenario] for scenario in node.scenarios)
+        units.extend(child.all_scenarios() for child in node.children.values())
+    return units
+
+
+def discover_scenarios(paths):
+    """
+    Parses the feature files and returns their scenarios (scenario outlines expanded).
+    """
+    scenarios = []
+    for feature_file in find_feature_files(paths):
+        feature = parse_file(feature_file)
+        if feature is not None:
+            scenarios.extend(feature.walk_scenarios())
+    return scenarios
+
+
+class PrefixRunner:
+    def __init__(self, paths, behave_args):
+        """
+        Loads the step definitions and environment hooks the same way behave does.
+
+        :param paths: Feature files or directories.
+        :param behave_args: Extra behave command line arguments (e.g. '-D', 'player_control=api').
+        """
+        self.runner = Runner(Configuration([*paths, *behave_args]))
+        self.runner.setup_paths()
+        self.runner.load_hooks()
+        self.runner.load_step_definitions()
+        self.context = Context(self.runner)
+        self.runner.context = self.context
+        self.results = {}  # Scenario location -> result dict
+        self.executed_steps = 0
+
+    def hook(self, name, *args):
+        hook_function = self.runner.hooks.get(name)
+        if hook_function is not None:
+            hook_function(self.context, *args)
+
+    def run_step(self, step):
+        """
+        Runs one step with the before_step/after_step hooks.
+
+        :return: The exception the step raised, or None if it passed.
+        """
+        self.context.table = step.table
+        self.context.text = step.text
+        self.hook("before_step", step)
+        error = None
+        try:
+            match = registry.find_match(step)
+            if match is None:
+                raise NotImplementedError(f"Undefined step: {step.keyword} {step.name}")
+            match.run(self.context)
+            step.status = Status.passed
+        except Exception as exception:
+            error = exception
+            step.status = Status.failed
+            step.exception = exception
+            step.error_message = f"{type(exception).__name__}: {exception}"
+        self.executed_steps += 1
+        self.hook("after_step", step)
+        return error
+
+    def checkpoint(self):
+        """
+        Saves the browser state to branch from. On a non-web page (about:blank) there is nothing to save.
+        """
+        driver = self.context.driver
+        driver.switch_to.default_content()  # Storage must be read from the top-level document
+        reset_frame_context(driver)
+        if not driver.current_url.startswith(("http://", "https://")):
+            return None
+        return capture_state(driver)
+
+    def restore(self, checkpoint):
+        driver = self.context.driver
+        if checkpoint is None:
+            DriverPool.reset(driver)  # Back to a blank session
+        else:
+            restore_state(driver, checkpoint, clear=True)
+        reset_frame_context(driver)
+
+    def run_node(self, node):
+        for scenario in node.scenarios:
+            self.results[str(scenario.location)] = {"name": scenario.name, "status": "passed"}
+
+        children = list(node.children.values())
+        checkpoint = self.checkpoint() if len(children) > 1 else None
+        for index, child in enumerate(children):
+            if index > 0:
+                self.restore(checkpoint)
+            self.context._push()  # Attributes set by this branch are removed by _pop
+            try:
+                error = self.run_step(child.step)
+                if error is None:
+                    self.run_node(child)
+                else:
+                    for scenario in child.all_scenarios():
+                        self.results[str(scenario.location)] = {
+                            "name": scenario.name, "status": "failed",
+                            "failed_step": f"{child.step.keyword} {child.step.name}",
+                            "error": child.step.error_message,
+                        }
+            finally:
+                self.context._pop()
+
+    def run(self, scenarios):
+        """
+        Runs the scenarios tree by tree, wrapped in the environment hooks.
+        """
+        self.hook("before_all")
+        try:
+            for tags, root in build_tree(scenarios).items():
+                scenario = root.all_scenarios()[0]  # Stands in for the whole group in the scenario hooks
+                self.context.scenario = scenario
+                self.context.tags = set(tags)
+                self.hook("before_scenario", scenario)
+                try:
+                    self.run_node(root)
+                finally:
+                    self.hook("after_scenario", scenario)
+        finally:
+            self.hook("after_all")
+        return self.results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run scenarios as a shared-prefix tree.")
+    parser.add_argument("paths", nargs="*", default=["features"], help="Feature files or directories (default: features)")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes sharing out the branches")
+    parser.add_argument("--shard", help="Run only shard i of n ('i/n'); used by --workers")
+    parser.add_argument("--output", default=os.path.join(REPORT_DIR, "prefix-report.json"))
+    argv = sys.argv[1:] if argv is None else argv
+    behave_args = []
+    if "--" in argv:  # Everything after '--' is passed to behave's configuration
+        behave_args = argv[argv.index("--") + 1:]
+        argv = argv[:argv.index("--")]
+    args = parser.parse_args(argv)
+    os.makedirs(REPORT_DIR, exist_ok=True)
+
+    scenarios = discover_scenarios(args.paths)
+    if args.workers > 1:
+        # One process per shard, each with its own browser profile like the parallel runner
+        processes = []
+        for worker_id in range(args.workers):
+            output = os.path.join(REPORT_DIR, f"prefix-worker-{worker_id}.json")
+            command = [sys.executable, "-m", "support.prefix_runner", *args.paths,
+                       "--shard", f"{worker_id}/{args.workers}", "--output", output,
+                       "--", *worker_defines(worker_id), *behave_args]
+            processes.append((subprocess.Popen(command), output))
+        results, exit_code = {}, 0
+        for process, output in processes:
+            exit_code = max(exit_code, process.wait())
+            if os.path.exists(output):
+                with open(output) as output_file:
+                    results.update(json.load(output_file)["results"])
+        executed = None
+    else:
+        if args.shard:
+            index, count = map(int, args.shard.split("/"))
+            scenarios = [scenario for unit in branch_units(scenarios)[index::count] for scenario in unit]
+        prefix_runner = PrefixRunner(args.paths, behave_args)
+        results = prefix_runner.run(scenarios)
+        executed = prefix_runner.executed_steps
+        exit_code = 0
+
+    with open(args.output, "w") as output_file:
+        json.dump({"results": results, "executed_steps": executed}, output_file, indent=2)
+
+    failed = [location for location, result in results.items() if result["status"] != "passed"]
+    for location in failed:
+        print(f"FAILED {location}: {results[location].get('failed_step')} -> {results[location].get('error')}")
+    print(f"{len(results)} scenarios: {len(results) - len(failed)} passed, {len(failed)} failed")
+    if executed is not None:
+        print(f"{executed} step executions (one scenario at a time: {sum(len(list(s.all_steps)) for s in scenarios)})")
+    return 1 if failed or exit_code else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,139 @@
+'''
+qoe.py (Video quality-of-experience metrics)
+Turns what the collector in the video iframe saw (see QOE_COLLECTOR_JS in pages/video_page.py) into
+metrics and checks them against config.QOE_THRESHOLDS:
+
+    startup_ms        Play click to first rendered frame
+    rebuffer_count    Stalls after playback started
+    rebuffer_ms       Total time spent stalled
+    dropped_frames    From HTMLVideoElement.getVideoPlaybackQuality()
+    decoded_frames    (same)
+    dropped_ratio     dropped_frames / decoded_frames
+    bitrate_switches  Rendered quality changes (requested or adaptive)
+    switch_ms         Requested quality -> time until the player rendered it, e.g. {"480p": 850}
+
+Steps call check_qoe; what happens on a threshold violation depends on context.qoe_mode
+('fail' fails the step, 'warn' prints a warning, 'off' skips the collection). Every checked sample is
+also recorded in the run's timing trace and in a per-run JSON file (see features/environment.py).
+'''
+
+import json
+import time
+
+import config
+from support.tracing import get_tracer
+
+
+def summarize(sample, play_requested_at=None, startup_seconds=None):
+    """
+    Computes the metrics from a collector sample.
+
+    :param sample: Dict returned by QOE_SAMPLE_JS (None if the collector is not installed).
+    :param play_requested_at: Epoch seconds at which Play was clicked.
+    :param startup_seconds: Click-to-playing time measured on the Python side, used when the collector
+                            missed the first frame (or the browser clock disagrees with ours).
+    :return: Dict of metrics; empty without a sample.
+    """
+    if not sample:
+        return {}
+    startup_ms = None
+    if sample["firstFrameAt"] is not None and play_requested_at is not None:
+        startup_ms = sample["firstFrameAt"] - play_requested_at * 1000
+        if startup_ms < 0:
+            startup_ms = None  # Remote browser with another clock
+    if startup_ms is None and startup_seconds is not None:
+        startup_ms = startup_seconds * 1000
+
+    dropped, decoded = sample["droppedFrames"], sample["decodedFrames"]
+    switches, labels = {}, []
+    for switch in sample["switches"]:
+        labels.append(switch["label"])
+        if switch["switchMs"] is not None:
+            switches[switch["label"]] = switch["switchMs"]  # The last requested switch to a label wins
+    return {
+        "startup_ms": startup_ms,
+        "rebuffer_count": sample["rebuffers"],
+        "rebuffer_ms": sample["rebufferMs"],
+        "dropped_frames": dropped,
+        "decoded_frames": decoded,
+        "dropped_ratio": dropped / decoded if dropped is not None and decoded else None,
+        "bitrate_switches": sum(1 for previous, label in zip(labels, labels[1:]) if label != previous),
+        "switch_ms": switches,
+    }
+
+
+def violations(metrics, names, thresholds=None, switches=()):
+    """
+    Lists the metrics above their threshold.
+
+    :param names: Metrics to check (keys of the thresholds).
+    :param switches: Quality labels that were requested; each one must have a switch_ms within the threshold.
+    """
+    thresholds = config.QOE_THRESHOLDS if thresholds is None else thresholds
+    if not metrics:
+        return ["no QoE sample (the player never rendered its video element)"]
+    problems = []
+    for name in names:
+        if name == "switch_ms":
+            for label in switches:
+                value = metrics["switch_ms"].get(label)
+                if value is None:
+                    problems.append(f"switch to {label} was not rendered")
+                elif value > thresholds["switch_ms"]:
+                    problems.append(f"switch to {label} took {value:.0f}ms > {thresholds['switch_ms']}ms")
+        elif metrics.get(name) is not None and metrics[name] > thresholds[name]:
+            problems.append(f"{name} {metrics[name]:.3g} > {thresholds[name]}")
+    return problems
+
+
+class QoeReport:
+    def __init__(self):
+        self.entries = []  # One {"scenario", "step", "metrics"} dict per checked sample
+
+    def add(self, scenario, step, metrics):
+        self.entries.append({"scenario": scenario, "step": step, "metrics": metrics})
+
+    def write(self, path):
+        with open(path, "w") as report_file:
+            json.dump({"thresholds": config.QOE_THRESHOLDS, "samples": self.entries}, report_file, indent=2)
+
+    def report(self):
+        """
+        Returns a text summary: the median and worst value of every scalar metric.
+        """
+        if not self.entries:
+            return "QoE: no samples"
+        lines = [f"QoE over {len(self.entries)} samples:", f"  {'metric':<18} {'median':>10} {'worst':>10}"]
+        for name in ("startup_ms", "rebuffer_count", "rebuffer_ms", "dropped_ratio", "bitrate_switches"):
+            values = sorted(entry["metrics"][name] for entry in self.entries if entry["metrics"].get(name) is not None)
+            if values:
+                lines.append(f"  {name:<18} {values[len(values) // 2]:>10.3g} {values[-1]:>10.3g}")
+        switch_times = sorted(value for entry in self.entries for value in entry["metrics"].get("switch_ms", {}).values())
+        if switch_times:
+            lines.append(f"  {'switch_ms':<18} {switch_times[len(switch_times) // 2]:>10.3g} {switch_times[-1]:>10.3g}")
+        return "\n".join(lines)
+
+
+def check_qoe(context, video_page, names, switches=()):
+    """
+    Samples the video page's QoE metrics, records them and checks them against config.QOE_THRESHOLDS.
+
+    :param names: Metrics to check, e.g. ("startup_ms", "rebuffer_count").
+    :param switches: Quality labels the step requested (checked when "switch_ms" is in names).
+    :return: The metrics (None when context.qoe_mode is 'off').
+    """
+    mode = getattr(context, "qoe_mode", "off")
+    if mode == "off":
+        return None
+    metrics = video_page.get_qoe_metrics()
+    step_name = getattr(context, "current_step_name", None)
+    get_tracer().record("qoe", step_name, time.perf_counter(), 0.0, **metrics)
+    if getattr(context, "qoe_report", None) is not None:
+        context.qoe_report.add(context.scenario.name, step_name, metrics)
+    problems = violations(metrics, names, switches=switches)
+    if problems:
+        message = f"Step '{step_name}' QoE below thresholds: " + "; ".join(problems)
+        if mode == "fail":
+            raise AssertionError(message)
+        print(f"WARNING: {message}")
+    return metrics
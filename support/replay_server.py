@@ -0,0 +1,195 @@
+'''
+replay_server.py (Local stand-in for the Indee site)
+Serves an archive recorded by support/har_recorder.py from a local HTTP server, so the suite can
+run offline against config.BASE_URL = the server's URL.
+
+The recorded application origin is served at the server root; every other recorded origin (CDN,
+player, API hosts) is served under /__host__/<host>/, and absolute URLs in text responses (HTML,
+JavaScript, CSS, JSON, playlists) are rewritten to point there. URLs that scripts assemble from
+pieces at runtime are not rewritten and get a 404.
+
+Latency can be injected to benchmark the framework separately from the site: every response is
+delayed by latency_ms +/- jitter_ms, where the jitter is derived from the seed, the request and how
+many times it was already served, so two runs with the same seed see the same delays.
+
+Usage:
+    python -m support.replay_server recordings/indee.har [--port 8765] [--latency-ms 50] [--jitter-ms 10] [--seed 1]
+    behave -D base_url=http://127.0.0.1:8765/
+'''
+
+import argparse
+import base64
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+HOST_PREFIX = "/__host__/"  # Path prefix of the origins other than the application's
+TEXT_TYPES = ("text", "javascript", "json", "xml", "mpegurl", "dash")  # Content types whose URLs are rewritten
+# Response headers that do not apply to the replayed body or would block the local origin
+DROPPED_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "connection", "alt-svc",
+                   "strict-transport-security", "content-security-policy"}
+
+
+class ReplayServer:
+    def __init__(self, archive_path, port=0, latency_ms=0, jitter_ms=0, seed=0):
+        """
+        :param archive_path: Archive written by HarRecorder.
+        :param port: Port to listen on (0 picks a free one).
+        :param latency_ms: Delay added to every response.
+        :param jitter_ms: Maximum deterministic deviation from latency_ms.
+        :param seed: Seed of the jitter.
+        """
+        with open(archive_path) as archive_file:
+            log = json.load(archive_file)["log"]
+        self.main_host = urlsplit(log["comment"]).netloc
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.seed = seed
+
+        # Recorded responses per (method, host, path?query), in recording order
+        self.responses = {}
+        for entry in log["entries"]:
+            if entry["response"]["status"] == 304:
+                continue  # A 304 has no body to replay into an empty browser cache
+            url = urlsplit(entry["request"]["url"])
+            target = url.path + ("?" + url.query if url.query else "")
+            self.responses.setdefault((entry["request"]["method"], url.netloc, target), []).append(entry["response"])
+        self.served = {}  # Times each key was served, to replay successive responses in order
+        self.lock = threading.Lock()
+
+        hosts = sorted({host for _, host, _ in self.responses} | {self.main_host}, key=len, reverse=True)
+        # Matches absolute and protocol-relative URLs of recorded hosts, JSON-escaped slashes included
+        self.url_pattern = re.compile(r"(?:https?:)?(?:\\?/){2}(" + "|".join(map(re.escape, hosts)) + r")(?![\w.-])")
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), self.handler_class())
+        self.thread = None
+
+    @property
+    def url(self):
+        """
+        The URL to use as config.BASE_URL.
+        """
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}/"
+
+    def local_origin(self, host):
+        """
+        Where a recorded origin is served from.
+        """
+        return self.url.rstrip("/") + ("" if host == self.main_host else HOST_PREFIX + host)
+
+    def find(self, method, path):
+        """
+        Returns the recorded response for a request to this server, or None.
+        """
+        host = self.main_host
+        if path.startswith(HOST_PREFIX):
+            host, _, rest = path[len(HOST_PREFIX):].partition("/")
+            path = "/" + rest
+        key = (method, host, path)
+        if key not in self.responses:
+            # Query strings often carry cache busters or timestamps: fall back to the path alone
+            bare_path = path.split("?", 1)[0]
+            key = next((candidate for candidate in self.responses
+                        if candidate[:2] == (method, host) and candidate[2].split("?", 1)[0] == bare_path), None)
+            if key is None:
+                return None, None
+        with self.lock:
+            count = self.served.get(key, 0)
+            self.served[key] = count + 1
+        responses = self.responses[key]
+        return responses[min(count, len(responses) - 1)], (key, count)
+
+    def delay(self, key, count):
+        """
+        Deterministic delay in seconds for the count-th time a key is served.
+        """
+        jitter = random.Random(f"{self.seed}|{key}|{count}").uniform(-self.jitter_ms, self.jitter_ms)
+        return max(0.0, self.latency_ms + jitter) / 1000
+
+    def body(self, response):
+        """
+        Decodes a recorded body and points the URLs of text responses at this server.
+        """
+        content = response["content"]
+        if content.get("encoding") == "base64":
+            return base64.b64decode(content["text"])
+        text = content.get("text", "")
+        if any(kind in content.get("mimeType", "") for kind in TEXT_TYPES):
+            text = self.url_pattern.sub(lambda match: self.local_origin(match.group(1)), text)
+        return text.encode("utf-8")
+
+    @staticmethod
+    def cookie(value):
+        """
+        Makes a recorded Set-Cookie value acceptable for the local plain-HTTP origin.
+        """
+        attributes = [part for part in value.split(";")
+                      if part.strip().split("=", 1)[0].lower() not in ("domain", "secure", "samesite")]
+        return ";".join(attributes)
+
+    def handler_class(self):
+        server = self
+
+        class ReplayHandler(BaseHTTPRequestHandler):
+            def handle_request(self):
+                response, served = server.find(self.command, self.path)
+                if response is None:
+                    self.send_error(404, "Not recorded")
+                    return
+                time.sleep(server.delay(*served))
+
+                body = server.body(response)
+                self.send_response(response["status"])
+                for header in response["headers"]:
+                    name = header["name"].lower()
+                    if name in DROPPED_HEADERS:
+                        continue
+                    for value in header["value"].split("\n"):  # DevTools joins repeated headers with newlines
+                        self.send_header(header["name"], server.cookie(value) if name == "set-cookie" else value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                if self.command != "HEAD":
+                    self.wfile.write(body)
+
+            do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = do_HEAD = do_OPTIONS = handle_request
+
+            def log_message(self, format, *args):
+                pass  # Keep the behave output readable
+
+        return ReplayHandler
+
+    def start(self):
+        """
+        Serves requests from a background thread.
+        """
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve a recorded archive of the Indee site locally.")
+    parser.add_argument("archive", help="Archive recorded with behave -D record=<path>")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    server = ReplayServer(args.archive, args.port, args.latency_ms, args.jitter_ms, args.seed)
+    print(f"Replaying {args.archive} on {server.url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
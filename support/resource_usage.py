@@ -0,0 +1,77 @@
+'''
+resource_usage.py (Per-session resource metrics)
+Samples how much memory and CPU each browser session uses, grouped by browser profile, so the
+profiles can be compared. JavaScript heap and main-thread task time come from the Chrome DevTools
+Protocol; resident memory and CPU time of the whole browser process tree are added when psutil is installed.
+'''
+
+try:
+    import psutil
+except ImportError:  # psutil is optional: without it only the DevTools metrics are reported
+    psutil = None
+
+
+
+def browser_processes(driver):
+    """
+    Returns the chromedriver process and every process it started (browser, renderers, GPU, ...).
+    """
+    service_process = getattr(getattr(driver, "service", None), "process", None)
+    if psutil is None or service_process is None:
+        return []
+    try:
+        root = psutil.Process(service_process.pid)
+        return [root] + root.children(recursive=True)
+    except psutil.Error:
+        return []
+
+
+class ResourceMonitor:
+    def __init__(self):
+        self.samples = {}  # Samples per profile name
+        self.cpu_seen = {}  # CPU seconds of each session at its previous sample, keyed by session id (id(driver) is reused)
+
+    def sample(self, profile_name, driver):
+        """
+        Records the resource usage of a session, typically at the end of each scenario.
+        CPU time is the time used since the session's previous sample.
+        """
+        sample = {}
+        try:
+            metrics = {metric["name"]: metric["value"]
+                       for metric in driver.execute_cdp_cmd("Performance.getMetrics", {})["metrics"]}
+            sample["js_heap_mb"] = metrics.get("JSHeapUsedSize", 0) / 2 ** 20
+            sample["task_seconds"] = metrics.get("TaskDuration", 0)
+        except Exception:  # Also connection errors when chromedriver itself died
+            return  # The session is gone; the pool will replace it
+
+        processes = browser_processes(driver)
+        if processes:
+            rss = cpu = 0
+            for process in processes:
+                try:
+                    rss += process.memory_info().rss
+                    times = process.cpu_times()
+                    cpu += times.user + times.system
+                except psutil.Error:
+                    continue  # The process exited while we were reading it
+            sample["rss_mb"] = rss / 2 ** 20
+            sample["cpu_seconds"] = cpu - self.cpu_seen.get(driver.session_id, 0)
+            self.cpu_seen[driver.session_id] = cpu
+
+        self.samples.setdefault(profile_name, []).append(sample)
+
+    def report(self):
+        """
+        Returns a table with the average of each metric per profile.
+        """
+        columns = ["js_heap_mb", "task_seconds", "rss_mb", "cpu_seconds"]
+        lines = ["Resource usage per profile (averages per scenario):",
+                 f"  {'profile':<12} {'samples':>7} " + " ".join(f"{column:>12}" for column in columns)]
+        for profile_name, samples in sorted(self.samples.items()):
+            averages = []
+            for column in columns:
+                values = [sample[column] for sample in samples if column in sample]
+                averages.append(f"{sum(values) / len(values):>12.2f}" if values else f"{'-':>12}")
+            lines.append(f"  {profile_name:<12} {len(samples):>7} " + " ".join(averages))
+        return "\n".join(lines)
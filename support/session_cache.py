@@ -0,0 +1,142 @@
+'''
+session_cache.py (Authenticated-session snapshot)
+Captures the cookies and localStorage/sessionStorage of a logged-in session once, and injects
+them into fresh or reset browser sessions so that scenarios do not have to repeat the PIN login.
+A snapshot can be kept on disk so that parallel workers of the same run share a single login: the
+login step holds login_lock() while it restores or logs in, so the first worker logs in and captures
+while the others wait, then restore its snapshot.
+'''
+
+import os
+import time
+from contextlib import nullcontext
+from urllib.parse import urlsplit
+
+from support.json_store import locked, read_json, write_json
+
+# Copies both storages of the current page into plain objects
+CAPTURE_STORAGE_JS = """
+var copy = function (storage) {
+    var items = {};
+    for (var i = 0; i < storage.length; i++) { var key = storage.key(i); items[key] = storage.getItem(key); }
+    return items;
+};
+return {local: copy(window.localStorage), session: copy(window.sessionStorage)};
+"""
+
+RESTORE_STORAGE_JS = """
+var local = arguments[0], session = arguments[1];
+Object.keys(local).forEach(function (key) { window.localStorage.setItem(key, local[key]); });
+Object.keys(session).forEach(function (key) { window.sessionStorage.setItem(key, session[key]); });
+"""
+
+# Cookie fields accepted by WebDriver's add_cookie
+COOKIE_FIELDS = ("name", "value", "path", "domain", "secure", "httpOnly", "expiry", "sameSite")
+
+
+def capture_state(driver):
+    """
+    Returns the current URL, cookies and local/sessionStorage of the page the driver is on.
+    """
+    storage = driver.execute_script(CAPTURE_STORAGE_JS)
+    return {
+        "url": driver.current_url,
+        "cookies": driver.get_cookies(),
+        "local_storage": storage["local"],
+        "session_storage": storage["session"],
+    }
+
+
+def restore_state(driver, state, url=None, clear=False):
+    """
+    Injects cookies and storage captured by capture_state, then loads a URL.
+
+    :param url: URL to load afterwards (defaults to the captured URL). Cookies and storage are set on its origin.
+    :param clear: Remove the session's current cookies and storage first.
+    """
+    url = url or state["url"]
+    # Cookies and storage can only be set for the origin currently loaded
+    if urlsplit(driver.current_url)[:2] != urlsplit(url)[:2]:
+        driver.get(url)
+    if clear:
+        driver.delete_all_cookies()
+        driver.execute_script("window.localStorage.clear(); window.sessionStorage.clear();")
+    for cookie in state["cookies"]:
+        driver.add_cookie({field: cookie[field] for field in COOKIE_FIELDS if field in cookie})
+    driver.execute_script(RESTORE_STORAGE_JS, state["local_storage"], state["session_storage"])
+    driver.get(url)  # Reload so the application starts with the injected state
+
+
+class SessionCache:
+    def __init__(self, base_url, path=None, max_age=1800):
+        """
+        :param base_url: URL of the application; the snapshot is captured and restored on this origin.
+        :param path: Optional JSON file the snapshot is shared through (e.g. between parallel workers).
+        :param max_age: Seconds after which a snapshot is considered expired even if its cookies are not.
+        """
+        self.base_url = base_url
+        self.path = path
+        self.max_age = max_age
+        self.snapshot = None
+
+    def capture(self, driver):
+        """
+        Stores the session of a driver that has just logged in. Must be called while on the application's origin.
+        """
+        self.snapshot = dict(capture_state(driver), captured_at=time.time())
+        if self.path:
+            write_json(self.path, self.snapshot)  # Another worker never reads a half-written file
+
+    def login_lock(self):
+        """
+        Serializes restore-or-login between the workers sharing the snapshot file, so only one of them
+        logs in while the others wait for its snapshot. Without a file there is nothing to share.
+        """
+        return locked(self.path) if self.path else nullcontext()
+
+    def load(self):
+        """
+        Returns the current snapshot, picking up one written by another worker if there is none in memory.
+        A missing or unreadable file means there is no snapshot.
+        """
+        if self.snapshot is None and self.path:
+            snapshot = read_json(self.path)
+            if isinstance(snapshot, dict) and {"captured_at", "cookies"} <= snapshot.keys():
+                self.snapshot = snapshot
+        return self.snapshot
+
+    def is_expired(self, snapshot):
+        """
+        A snapshot is expired once it is older than max_age or one of its cookies has expired.
+        """
+        now = time.time()
+        if now - snapshot["captured_at"] > self.max_age:
+            return True
+        return any(cookie.get("expiry") is not None and cookie["expiry"] <= now for cookie in snapshot["cookies"])
+
+    def invalidate(self):
+        """
+        Drops the snapshot, e.g. when the application no longer accepts it, so that the next login captures a new one.
+        """
+        self.snapshot = None
+        if self.path:
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass  # Another worker invalidated it first
+
+    def restore(self, driver):
+        """
+        Injects the snapshot into a driver and reloads the application.
+
+        :return: True if a valid snapshot was injected, False if the caller has to log in for real.
+        """
+        snapshot = self.load()
+        if snapshot is None:
+            return False
+        if self.is_expired(snapshot):
+            self.invalidate()
+            return False
+
+        restore_state(driver, snapshot, self.base_url)
+        return True
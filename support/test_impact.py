@@ -0,0 +1,325 @@
+'''
+test_impact.py (Test-impact selection)
+Runs only the scenarios whose inputs changed since they last passed, failures first.
+
+Each scenario gets a fingerprint: a hash of its tags and step texts (tables and doc strings
+included), the source of the step-definition functions it uses, and the files those functions reach:
+the modules of the names they use (e.g. config, support.qoe) and the page objects they get through
+`context.pages.<name>` (e.g. pages/video_page.py), each with its import closure (pages/base_page.py,
+pages/conditions.py, ...). features/environment.py is included as well, but not its imports: use
+--all after changing support code that only the hooks use (driver pool, network, ...).
+
+Results are kept in config.IMPACT_CACHE_FILE. A scenario is skipped when its fingerprint is
+unchanged, it passed last time and that pass is younger than config.IMPACT_MAX_AGE. The others run
+in two phases: the ones that failed last time first, then the rest ordered by historical failure
+rate (highest first) and duration (shortest first). Within a phase behave runs the scenarios of one
+feature file in file order, so the order is by feature file; spread over --workers it starts the
+most likely failures first.
+
+Usage:
+    python -m support.test_impact [features/...] [--all] [--dry-run] [--fail-fast] [--workers N] [-- <behave args>]
+'''
+
+import argparse
+import ast
+import hashlib
+import inspect
+import json
+import os
+import sys
+import time
+import types
+
+from behave.configuration import Configuration
+from behave.runner import Runner
+from behave.step_registry import registry
+
+import config
+from support.json_store import read_json, write_json
+from support.page_registry import PageRegistry
+from support.parallel_runner import REPORT_DIR, run_locations
+from support.prefix_runner import discover_scenarios, step_key
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HOOKS_FILE = os.path.join(ROOT, "features", "environment.py")
+HISTORY_SIZE = 20  # Past outcomes kept per scenario for the failure rate and duration
+
+file_digests = {}  # Path -> SHA-256 of its content
+imports = {}  # Path -> repository modules it imports directly
+function_inputs_cache = {}  # Step function -> (source, reachable files)
+
+
+def file_digest(path):
+    if path not in file_digests:
+        with open(path, "rb") as source_file:
+            file_digests[path] = hashlib.sha256(source_file.read()).hexdigest()
+    return file_digests[path]
+
+
+def resolve_module(name, search_dirs):
+    """
+    Path of a module of this repository, or None for the standard library and third-party packages.
+    """
+    relative = name.replace(".", os.sep)
+    for directory in search_dirs:
+        for candidate in (relative + ".py", os.path.join(relative, "__init__.py")):
+            path = os.path.join(directory, candidate)
+            if os.path.isfile(path):
+                return os.path.abspath(path)
+    return None
+
+
+def import_closure(paths):
+    """
+    The given files plus every repository module they import, directly or not (found by parsing, not importing).
+    """
+    result = set()
+    pending = list(paths)
+    while pending:
+        path = pending.pop()
+        if path in result:
+            continue
+        result.add(path)
+        if path not in imports:
+            imported = set()
+            search_dirs = [ROOT, os.path.dirname(path)]  # behave puts the steps directory on sys.path
+            with open(path) as source_file:
+                tree = ast.parse(source_file.read(), path)
+            for node in ast.walk(tree):
+                names = []
+                if isinstance(node, ast.Import):
+                    names = [alias.name for alias in node.names]
+                elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                    # 'from package import module' imports a module, 'from module import name' does not
+                    names = [node.module] + [f"{node.module}.{alias.name}" for alias in node.names]
+                for name in names:
+                    module_path = resolve_module(name, search_dirs)
+                    if module_path:
+                        imported.add(module_path)
+            imports[path] = imported
+        pending.extend(imports[path])
+    return result
+
+
+def module_file(value):
+    """
+    Source file of a module, or of the module defining a function or class; None if it is not in this repository.
+    """
+    module = value if isinstance(value, types.ModuleType) else inspect.getmodule(value)
+    path = getattr(module, "__file__", None)
+    if path and os.path.abspath(path).startswith(ROOT + os.sep) and path.endswith(".py") and "site-packages" not in path:
+        return os.path.abspath(path)
+    return None
+
+
+def code_names(code):
+    names = set(code.co_names)
+    for constant in code.co_consts:
+        if isinstance(constant, types.CodeType):  # Nested functions, comprehensions
+            names |= code_names(constant)
+    return names
+
+
+def page_files(attribute_names):
+    """
+    Files of the page objects reached through `context.pages.<name>` (properties of PageRegistry).
+    """
+    files = set()
+    for name in attribute_names:
+        page_property = getattr(PageRegistry, name, None)
+        if not isinstance(page_property, property):
+            continue
+        page_globals = page_property.fget.__globals__
+        for page_name in page_property.fget.__code__.co_names:
+            path = module_file(page_globals[page_name]) if inspect.isclass(page_globals.get(page_name)) else None
+            if path:
+                files.add(path)
+    return files
+
+
+def function_inputs(function):
+    """
+    What a step-definition function depends on.
+
+    :return: Tuple of (source text of the function, set of files it reaches).
+    """
+    files = set()
+    layer = function
+    while layer is not None:  # Decorators such as @command_budget wrap the step function
+        path = module_file(layer)
+        if path and layer is not function:
+            files.add(path)  # The decorator's module
+        innermost = layer
+        layer = getattr(layer, "__wrapped__", None)
+    names = code_names(innermost.__code__)
+    for name in names:
+        if name in innermost.__globals__:
+            path = module_file(innermost.__globals__[name])
+            if path:
+                files.add(path)
+    files |= page_files(names)
+    return inspect.getsource(innermost), import_closure(files)
+
+
+def load_step_definitions(paths):
+    runner = Runner(Configuration([*paths]))
+    runner.setup_paths()
+    runner.load_step_definitions()
+
+
+def fingerprint(scenario):
+    """
+    Hash of everything the scenario's outcome depends on (see the module docstring).
+    """
+    digest = hashlib.sha256()
+    digest.update(json.dumps(sorted(scenario.effective_tags)).encode())
+    digest.update(file_digest(HOOKS_FILE).encode())
+    files = set()
+    for step in scenario.all_steps:
+        digest.update(repr(step_key(step)).encode())
+        match = registry.find_match(step)
+        if match is None:
+            digest.update(b"undefined")
+            continue
+        function = match.func
+        if function not in function_inputs_cache:
+            function_inputs_cache[function] = function_inputs(function)
+        source, function_files = function_inputs_cache[function]
+        digest.update(source.encode())
+        files |= function_files
+    for path in sorted(files):
+        digest.update(os.path.relpath(path, ROOT).encode() + file_digest(path).encode())
+    return digest.hexdigest()
+
+
+def scenario_id(scenario):
+    # Stable when lines move: feature file and scenario name (outline rows have their example in the name)
+    return f"{scenario.location.filename}::{scenario.name}"
+
+
+class ResultsCache:
+    def __init__(self, path):
+        self.path = path
+        # Scenario id -> {"fingerprint", "status", "finished", "history": [[status, duration], ...]}; empty if unreadable
+        self.entries = read_json(path, {})
+
+    def is_unchanged_pass(self, key, scenario_fingerprint, now, max_age):
+        entry = self.entries.get(key)
+        return (entry is not None and entry["fingerprint"] == scenario_fingerprint and entry["status"] == "passed"
+                and now - entry["finished"] <= max_age)
+
+    def failed_last(self, key):
+        entry = self.entries.get(key)
+        return entry is not None and entry["status"] != "passed"
+
+    def failure_rate(self, key):
+        history = self.entries.get(key, {}).get("history", [])
+        return sum(status != "passed" for status, _ in history) / len(history) if history else 0.0
+
+    def mean_duration(self, key):
+        history = self.entries.get(key, {}).get("history", [])
+        return sum(duration for _, duration in history) / len(history) if history else 0.0
+
+    def record(self, key, scenario_fingerprint, status, duration, finished):
+        entry = self.entries.setdefault(key, {"history": []})
+        entry.update(fingerprint=scenario_fingerprint, status=status, finished=finished)
+        entry["history"] = (entry["history"] + [[status, duration]])[-HISTORY_SIZE:]
+
+    def save(self):
+        write_json(self.path, self.entries, indent=2, sort_keys=True)
+
+
+def order_by_feature(scenarios, priority):
+    """
+    Orders the scenarios' locations by feature file, the file with the most urgent scenario first.
+    """
+    best = {}
+    for scenario in scenarios:
+        filename = scenario.location.filename
+        best[filename] = min(best.get(filename, priority(scenario)), priority(scenario))
+    ordered = sorted(scenarios, key=lambda scenario: (best[scenario.location.filename], scenario.location.filename))
+    return [str(scenario.location) for scenario in ordered]
+
+
+def scenario_results(features):
+    """
+    Status and duration of every scenario in a behave JSON report, by location.
+    """
+    results = {}
+    for feature in features:
+        for element in feature.get("elements", []):
+            if element.get("type") == "background":
+                continue
+            duration = sum(step.get("result", {}).get("duration", 0.0) for step in element.get("steps", []))
+            results[element["location"]] = (element.get("status", "untested"), duration)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run only the scenarios affected by changes, failures first.")
+    parser.add_argument("paths", nargs="*", default=["features"], help="Feature files or directories (default: features)")
+    parser.add_argument("--all", action="store_true", help="Run unchanged passing scenarios too (still ordered)")
+    parser.add_argument("--dry-run", action="store_true", help="Only print the plan")
+    parser.add_argument("--fail-fast", action="store_true", help="Stop after the failures phase if it still fails")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes per phase")
+    parser.add_argument("--cache", default=config.IMPACT_CACHE_FILE)
+    argv = sys.argv[1:] if argv is None else argv
+    behave_args = []
+    if "--" in argv:  # Everything after '--' is passed to behave unchanged
+        behave_args = argv[argv.index("--") + 1:]
+        argv = argv[:argv.index("--")]
+    args = parser.parse_args(argv)
+
+    load_step_definitions(args.paths)
+    cache = ResultsCache(args.cache)
+    now = time.time()
+    fingerprints, skipped, failed_before, remaining = {}, [], [], []
+    for scenario in discover_scenarios(args.paths):
+        key = scenario_id(scenario)
+        fingerprints[str(scenario.location)] = (key, fingerprint(scenario))
+        if not args.all and cache.is_unchanged_pass(key, fingerprints[str(scenario.location)][1], now, config.IMPACT_MAX_AGE):
+            skipped.append(scenario)
+        elif cache.failed_last(key):
+            failed_before.append(scenario)
+        else:
+            remaining.append(scenario)
+
+    def priority(scenario):
+        key = scenario_id(scenario)
+        return (-cache.failure_rate(key), cache.mean_duration(key))
+
+    phases = [("failed last time", order_by_feature(failed_before, priority)),
+              ("changed or new", order_by_feature(remaining, priority))]
+    print(f"{len(skipped)} scenario(s) skipped (unchanged since they passed), "
+          f"{len(failed_before)} failed last time, {len(remaining)} changed or new.")
+    if args.dry_run:
+        for name, locations in phases:
+            for location in locations:
+                print(f"  [{name}] {location}")
+        return 0
+
+    exit_code = 0
+    for phase, (name, locations) in enumerate(phases):
+        if not locations:
+            continue
+        print(f"Phase {phase + 1}: {name}")
+        output = os.path.join(REPORT_DIR, f"impact-phase-{phase + 1}.json")
+        phase_code, features = run_locations(locations, args.workers, behave_args, output)
+        exit_code = max(exit_code, phase_code)
+        finished = time.time()
+        for location, (status, duration) in scenario_results(features).items():
+            if location in fingerprints and status in ("passed", "failed", "error"):  # Not skipped/untested
+                key, scenario_fingerprint = fingerprints[location]
+                cache.record(key, scenario_fingerprint, status, duration, finished)
+        cache.save()  # After every phase, so an interrupted run keeps what it learned
+        failures = [location for location, (status, _) in scenario_results(features).items() if status != "passed"]
+        for location in failures:
+            print(f"FAILED {location}")
+        if failures and args.fail_fast:
+            print("Stopping: --fail-fast")
+            break
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
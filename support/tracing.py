@@ -0,0 +1,124 @@
+'''
+tracing.py (Timing instrumentation)
+Records how long steps, waits and element actions take, with their outcome, and writes them as a
+JSON-lines file and a Chrome trace file (chrome://tracing, Perfetto) per run, plus a summary table
+of the slowest steps and locators.
+
+The page objects report to the tracer returned by get_tracer(). Until a run installs one with
+set_tracer() it is disabled and recording costs nothing.
+'''
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+
+class Tracer:
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.events = []
+        self.origin = time.perf_counter()  # Trace timestamps are relative to the tracer's creation
+        self.lock = threading.Lock()
+
+    def record(self, kind, name, start, duration, **fields):
+        """
+        Records one finished event.
+
+        :param kind: Event category: 'step', 'wait', 'click', 'send_keys', ...
+        :param name: What the event was about (step text, locator, ...).
+        :param start: time.perf_counter() value when the event started.
+        :param duration: Duration in seconds.
+        :param fields: Extra data such as the outcome, the locator or the number of polls.
+        """
+        if not self.enabled:
+            return
+        event = {"kind": kind, "name": name, "start": start - self.origin, "duration": duration, **fields}
+        with self.lock:
+            self.events.append(event)
+
+    @contextmanager
+    def span(self, kind, name, **fields):
+        """
+        Times the enclosed block and records it with outcome 'passed', or 'failed' and the error type.
+        The yielded dict can be filled with extra fields from inside the block.
+        """
+        start = time.perf_counter()
+        try:
+            yield fields
+        except Exception as error:
+            self.record(kind, name, start, time.perf_counter() - start, outcome="failed", error=type(error).__name__, **fields)
+            raise
+        self.record(kind, name, start, time.perf_counter() - start, outcome="passed", **fields)
+
+    def write_jsonl(self, path):
+        """
+        Writes one JSON object per event.
+        """
+        with open(path, "w") as trace_file:
+            for event in self.events:
+                trace_file.write(json.dumps(event) + "\n")
+
+    def write_chrome_trace(self, path):
+        """
+        Writes the events in the Chrome trace event format (complete 'X' events, microseconds).
+        """
+        trace_events = [{
+            "name": event["name"],
+            "cat": event["kind"],
+            "ph": "X",
+            "ts": event["start"] * 1e6,
+            "dur": event["duration"] * 1e6,
+            "pid": os.getpid(),
+            "tid": 0,
+            "args": {key: value for key, value in event.items() if key not in ("kind", "name", "start", "duration")},
+        } for event in self.events]
+        with open(path, "w") as trace_file:
+            json.dump({"traceEvents": trace_events, "displayTimeUnit": "ms"}, trace_file)
+
+    def aggregate(self, kind):
+        """
+        Groups events of one kind by name.
+
+        :return: List of (name, count, total, max) sorted by total duration, slowest first.
+        """
+        totals = {}
+        for event in self.events:
+            if event["kind"] != kind:
+                continue
+            count, total, longest = totals.get(event["name"], (0, 0.0, 0.0))
+            totals[event["name"]] = (count + 1, total + event["duration"], max(longest, event["duration"]))
+        return sorted(((name, *values) for name, values in totals.items()), key=lambda row: row[2], reverse=True)
+
+    def summary(self, top=10):
+        """
+        Returns a text table of the slowest steps and locators (waits).
+        """
+        lines = []
+        for kind, title in (("step", "Slowest steps"), ("wait", "Slowest waits by locator")):
+            rows = self.aggregate(kind)[:top]
+            if not rows:
+                continue
+            lines.append(f"{title}:")
+            lines.append(f"  {'total (s)':>10} {'max (s)':>8} {'count':>6}  name")
+            lines.extend(f"  {total:>10.3f} {longest:>8.3f} {count:>6}  {name}" for name, count, total, longest in rows)
+        return "\n".join(lines)
+
+
+_tracer = Tracer(enabled=False)
+
+
+def get_tracer():
+    """
+    Returns the tracer of the current run (a disabled one if tracing is off).
+    """
+    return _tracer
+
+
+def set_tracer(tracer):
+    """
+    Installs the tracer the page objects and hooks report to.
+    """
+    global _tracer
+    _tracer = tracer